@@ -14,12 +14,12 @@ _extra_datas = [(str(_st_static), "streamlit/static")] if _st_static.exists() el
 
 # Ensure the main app script is available after extraction (_MEIPASS).
 _app_file = Path("app.py")
-_processor_file = Path("processor.py")
-for _f in (_app_file, _processor_file):
+_modules = ["processor", "parse_cache", "jobs", "watcher", "profiling", "visit_index", "startup", "discovery", "result_store"]
+for _f in [_app_file] + [Path(f"{m}.py") for m in _modules]:
     if _f.exists():
         _extra_datas.append((_f.as_posix(), "."))
 
-_hidden = list(_st_hidden) + ["processor"]
+_hidden = list(_st_hidden) + _modules
 
 a = Analysis(
     ['launch.py'],
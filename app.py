@@ -1,65 +1,363 @@
-import io
+from __future__ import annotations
+
+import json
+import os
 import datetime as dt
 import tempfile
 import zipfile
 import shutil
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
-import pandas as pd
 import streamlit as st
 
-from processor import run_matching
+import startup
+from discovery import ScanOptions
+from jobs import Job, get_job, start_job
+from parse_cache import DEFAULT_CACHE_PATH, ParseCache
+from profiling import StageTimings
+
+# pandas/processor/visit_index/watcher는 startup.preload가 화면을 그리는 동안 미리 읽고,
+# 여기서는 쓰는 함수 안에서 import한다. (첫 화면이 이들의 import를 기다리지 않도록)
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from processor import ZipPdfSource
+    from result_store import ResultHandle
+
+LIVE_PREVIEW_ROWS = 50
+JOB_POLL_SEC = 1.0
+# processor.DEFAULT_ZIP_BUFFER와 같은 값. 첫 화면의 사이드바가 processor import를 기다리지 않도록 따로 둔다.
+DEFAULT_ZIP_BUFFER_MB = 64
+
+
+def _artifact(handle: ResultHandle, table: str, fmt: str) -> Callable[[], bytes]:
+    """
+    다운로드 버튼을 누를 때 호출되는 생성 함수를 돌려준다.
+    파일은 실행 결과 폴더에 한 번 만들어 두고 다시 쓴다. (세션 메모리에 두지 않음)
+    """
+
+    def build() -> bytes:
+        from processor import export_table
+        from result_store import ResultStore
+
+        store = ResultStore()
+        path = store.artifact_path(handle, f"export_{table}.{fmt}")
+        if not path.exists():
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            export_table(store.table(handle, table), tmp, fmt)
+            os.replace(tmp, path)
+        return path.read_bytes()
 
+    return build
 
-def _to_excel_bytes(df: pd.DataFrame) -> bytes:
-    """DataFrame을 엑셀 바이너리로 변환."""
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False)
-    buffer.seek(0)
-    return buffer.read()
 
+# 미리보기 매칭 상태 필터 표시 이름 (result_store.MATCH_STATUSES)
+MATCH_STATUS_LABELS = {"all": "전체", "matched": "매칭 성공", "unmatched": "매칭 실패", "fuzzy": "유사 매칭"}
+PREVIEW_PAGE_SIZES = (50, 100, 200, 500)
+
+
+def _render_preview(handle: ResultHandle, table: str) -> None:
+    """결과 표 한 페이지. 필터와 페이지 나누기는 Parquet 스캔에서 처리하고 화면에는 한 페이지만 가져온다."""
+    from result_store import ResultFilter, ResultStore
+
+    cols = st.columns(4 if table == "excel" else 3)
+    patient = cols[0].text_input("환자 이름", key=f"{table}_filter_patient", placeholder="부분 일치")
+    dates = cols[1].date_input("진료일 범위", value=(), key=f"{table}_filter_dates")
+    file = cols[2].text_input("파일", key=f"{table}_filter_file", placeholder="경로 부분 일치")
+    status = "all"
+    if table == "excel":
+        status = cols[3].selectbox(
+            "매칭 상태", list(MATCH_STATUS_LABELS), format_func=MATCH_STATUS_LABELS.get, key="excel_filter_status"
+        )
+    dates = tuple(dates) if isinstance(dates, (list, tuple)) else (dates,)
+    filters = ResultFilter(
+        patient=patient,
+        date_from=dates[0] if dates else None,
+        date_to=dates[-1] if dates else None,
+        status=status,
+        file=file,
+    )
+
+    store = ResultStore()
+    try:
+        total = store.count(handle, table, filters)
+    except FileNotFoundError as e:
+        st.warning(str(e))
+        return
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox("페이지 크기", PREVIEW_PAGE_SIZES, index=1, key=f"{table}_page_size")
+    pages = max(1, -(-total // page_size))
+    page_key = f"{table}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = col_page.number_input("페이지", min_value=1, max_value=pages, value=1, step=1, key=page_key)
+    col_info.caption(f"조건에 맞는 행 {total:,}개 / 전체 {handle.pdf_rows if table == 'pdf' else handle.excel_rows:,}개")
+    st.dataframe(
+        store.page(handle, table, filters, page=int(page) - 1, page_size=page_size),
+        use_container_width=True,
+        height=400,
+    )
+
+
+def _render_results(handle: ResultHandle, ts: str | None = None) -> None:
+    from processor import EXPORT_FORMATS
+    from result_store import ResultStore
+
+    if not ResultStore().exists(handle):
+        st.warning("결과 보관 기간이 지나 삭제되었습니다. 다시 실행하세요.")
+        st.session_state.results = None
+        return
 
-def _render_results(df_pdf: pd.DataFrame, df_excel: pd.DataFrame, matched: int, ts: str | None = None) -> None:
     st.subheader("결과 요약")
-    n_pdf_files = df_pdf["File"].nunique() if "File" in df_pdf.columns else len(df_pdf)
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric(label="PDF 파일 수", value=n_pdf_files)
-    col2.metric(label="PDF 추출 건수", value=len(df_pdf))
-    col3.metric(label="엑셀 행 수", value=len(df_excel))
-    col4.metric(label="매칭 성공 건수", value=matched)
+    col1.metric(label="PDF 파일 수", value=handle.pdf_files)
+    col2.metric(label="PDF 추출 건수", value=handle.pdf_rows)
+    col3.metric(label="엑셀 행 수", value=handle.excel_rows)
+    col4.metric(label="매칭 성공 건수", value=handle.matched)
 
     st.divider()
     st.subheader("PDF 추출 결과 미리보기")
-    st.dataframe(df_pdf.head(200), use_container_width=True, height=400)
+    _render_preview(handle, "pdf")
 
     st.subheader("병합된 엑셀 미리보기")
-    st.dataframe(df_excel.head(200), use_container_width=True, height=400)
+    _render_preview(handle, "excel")
 
     st.divider()
     st.subheader("다운로드")
-    pdf_bytes = _to_excel_bytes(df_pdf)
-    excel_bytes = _to_excel_bytes(df_excel)
     ts = ts or dt.datetime.now().strftime("%Y%m%d%H%M%S")
+    fmt = st.radio(
+        "파일 형식",
+        list(EXPORT_FORMATS),
+        horizontal=True,
+        key="export_fmt",
+        help="csv/parquet는 대용량 결과에서 xlsx보다 빠르게 생성됩니다.",
+    )
     col_d1, col_d2 = st.columns(2)
     with col_d1:
         st.download_button(
-            "PDF 요약 엑셀 다운로드",
-            data=pdf_bytes,
-            file_name=f"pdf_summary_{ts}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "PDF 요약 다운로드",
+            data=_artifact(handle, "pdf", fmt),
+            file_name=f"pdf_summary_{ts}.{fmt}",
+            mime=EXPORT_FORMATS[fmt],
+            on_click="ignore",
             use_container_width=True,
         )
     with col_d2:
         st.download_button(
-            "병합 엑셀 다운로드",
-            data=excel_bytes,
-            file_name=f"pt_list_merge_{ts}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "병합 결과 다운로드",
+            data=_artifact(handle, "excel", fmt),
+            file_name=f"pt_list_merge_{ts}.{fmt}",
+            mime=EXPORT_FORMATS[fmt],
+            on_click="ignore",
             use_container_width=True,
         )
 
 
+def _render_timings(data: dict, ts: str | None = None) -> None:
+    import pandas as pd
+
+    st.subheader("단계별 소요 시간")
+    stages = data.get("stages", {})
+    total = sum(s["seconds"] for s in stages.values()) or 1.0
+    st.caption(f"전체 경과 {data.get('wall_sec', 0):.2f}s (병렬 파싱 시 단계 합계는 경과 시간보다 클 수 있음)")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {"단계": name, "시간(s)": s["seconds"], "횟수": s["count"], "비율(%)": round(100 * s["seconds"] / total, 1)}
+                for name, s in stages.items()
+            ]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+    if data.get("slowest_files"):
+        st.caption("가장 느린 파일")
+        st.dataframe(pd.DataFrame(data["slowest_files"]), use_container_width=True, hide_index=True)
+    st.download_button(
+        "단계별 시간 JSON 다운로드",
+        data=json.dumps(data, ensure_ascii=False, indent=2),
+        file_name=f"timings_{ts or dt.datetime.now().strftime('%Y%m%d%H%M%S')}.json",
+        mime="application/json",
+        on_click="ignore",
+    )
+
+
+def _render_log_box(lines: list[str]) -> None:
+    html = """
+    <div style="height:200px; overflow-y:auto; background:#f0f0f0; color:#111;
+                padding:8px; border-radius:4px; font-family:monospace;
+                white-space:pre-wrap; border:1px solid #d0d0d0;">{logs}</div>
+    """.format(logs="\n".join(lines))
+    st.markdown(html, unsafe_allow_html=True)
+
+
+def _save_results(df_pdf: pd.DataFrame, df_excel: pd.DataFrame, matched: int) -> ResultHandle:
+    """결과 표는 실행별 Parquet로 내려 두고 핸들만 돌려준다. (작업 레지스트리와 세션이 표를 붙잡지 않도록)"""
+    from result_store import ResultStore
+
+    return ResultStore().save(df_pdf, df_excel, matched)
+
+
+def _matching_job(
+    job: Job,
+    pdf_dir: str | list[str] | ZipPdfSource | None,
+    input_xlsx: str,
+    sheet_name: str,
+    columns: str,
+    workers: int,
+    engine: str,
+    use_cache: bool,
+    profile: bool = False,
+    use_index: bool = False,
+    fuzzy: bool = False,
+    bounded: bool = False,
+    scan: ScanOptions | None = None,
+) -> ResultHandle:
+    """
+    작업 스레드에서 run_matching을 실행하고 결과를 디스크에 저장한 핸들을 돌려준다. 화면 갱신은 job 이벤트로만 전달.
+    scan: PDF 폴더 탐색 설정 (제외 패턴, 깊이 제한)
+    use_index: 방문 색인에 추출 결과를 저장한다. (pdf_dir이 None이면 색인만으로 매칭)
+    fuzzy: 정확 매칭되지 않은 행을 유사도로 2차 매칭한다.
+    bounded: 기본 ParseLimits로 메모리 제한 파싱을 한다.
+    """
+    from processor import ParseLimits, ZipPdfSource, format_page_stats, run_matching
+    from visit_index import VisitIndex
+
+    live_rows: list[dict] = []
+    timings = StageTimings() if profile else None
+
+    def on_progress(done: int, total: int, file: Path, rows: int):
+        job.set_progress(done, total, f"{done}/{total} 처리 중: {file.name} (rows={rows})")
+        parent_name = file.parent.name or file.parent
+        job.log(f"{done}/{total} | {parent_name}\\{file.name} | rows={rows}")
+
+    def on_timings(snapshot: dict):
+        job.update(timings=snapshot)
+
+    def on_records(file: Path, records: list[dict], matched_so_far: int):
+        live_rows.extend(records)
+        del live_rows[:-LIVE_PREVIEW_ROWS]
+        job.update(matched=matched_so_far, rows=list(live_rows))
+
+    cache = ParseCache() if use_cache and pdf_dir else None
+    index = VisitIndex() if use_index else None
+    page_stats: dict[str, int] = {}
+    match_stats: dict[str, int] = {}
+    resource_stats: dict = {}
+    duplicate_files: dict[str, list[str]] = {}
+    try:
+        df_pdf, df_excel, matched = run_matching(
+            pdf_dir=pdf_dir,
+            input_xlsx=input_xlsx,
+            sheet_name=sheet_name,
+            columns=columns,
+            progress_cb=on_progress,
+            stop_flag=job.cancelled,
+            workers=workers,
+            cache=cache,
+            engine=engine,
+            page_stats=page_stats,
+            records_cb=on_records,
+            timings=timings,
+            timings_cb=on_timings,
+            index=index,
+            fuzzy=fuzzy,
+            match_stats=match_stats,
+            limits=ParseLimits() if bounded else None,
+            resource_stats=resource_stats,
+            duplicate_files=duplicate_files,
+            scan=scan,
+        )
+        job.log(format_page_stats(page_stats))
+        if fuzzy:
+            job.log(f"유사 매칭 - {match_stats.get('fuzzy', 0)}건 (Match/Confidence/Match Reason 열 확인)")
+        if duplicate_files:
+            n_dup = sum(len(paths) for paths in duplicate_files.values())
+            job.log(f"중복 PDF - {n_dup}개는 내용이 같은 파일을 한 번만 파싱했습니다.")
+            for kept, paths in duplicate_files.items():
+                for path in paths:
+                    job.log(f"  {path} = {kept}")
+        for skipped in resource_stats.get("skipped_files", []):
+            job.log(f"건너뛴 PDF - {skipped['file']}: {skipped['reason']}")
+        memory = f"메모리 - 최대 RSS {resource_stats['peak_rss_mb']:.0f}MB"
+        if bounded:
+            memory += (
+                f", 작업 프로세스 최대 {resource_stats['worker_peak_rss_mb']:.0f}MB, "
+                f"풀 교체 {resource_stats['recycled']}회"
+            )
+        job.log(memory)
+        job.log(f"완료 - 매칭 성공: {matched}건")
+        return _save_results(df_pdf, df_excel, matched)
+    finally:
+        if timings is not None:
+            timings.finish()
+            job.update(timings=timings.to_dict())
+        if cache is not None:
+            job.log(f"파싱 캐시 - hit: {cache.hits}, miss: {cache.misses}")
+            cache.close()
+        if index is not None:
+            stats = index.stats()
+            job.log(f"방문 색인 - 파일: {stats['files']}, 방문: {stats['visits']} ({stats['dos_from']} ~ {stats['dos_to']})")
+            index.close()
+        if isinstance(pdf_dir, ZipPdfSource):
+            pdf_dir.close()
+
+
+def _watch_job(
+    job: Job,
+    pdf_dir: str | list[str],
+    input_xlsx: str,
+    sheet_name: str,
+    columns: str,
+    workers: int,
+    engine: str,
+    use_cache: bool,
+) -> ResultHandle:
+    """감시 모드: 감시가 없으면 시작(전체 스캔), 있으면 지금까지 반영된 결과만 가져온다."""
+    from watcher import ensure_watcher
+
+    def on_progress(done: int, total: int, file: Path, rows: int):
+        job.set_progress(done, total, f"{done}/{total} 처리 중: {file.name} (rows={rows})")
+        job.log(f"{done}/{total} | {file.parent.name or file.parent}\\{file.name} | rows={rows}")
+
+    watcher, started = ensure_watcher(
+        pdf_dir,
+        input_xlsx,
+        sheet_name,
+        columns,
+        engine=engine,
+        workers=workers,
+        cache=ParseCache() if use_cache else None,
+        progress_cb=on_progress,
+        stop_flag=job.cancelled,
+    )
+    df_pdf, df_excel, matched = watcher.snapshot()
+    job.log(f"{'감시 시작' if started else '감시 결과 갱신'} - 매칭 성공: {matched}건")
+    return _save_results(df_pdf, df_excel, matched)
+
+
+def _job_panel(job_id: str) -> None:
+    """실행 중인 작업의 진행 상황. st.fragment(run_every=...)로 주기적으로 다시 그린다."""
+    job = get_job(job_id)
+    if job is None:
+        return
+    job.poll()
+    done, total, text = job.progress
+    st.progress(done / total if total else 0.0, text=text or "대기 중")
+    if "matched" in job.state:
+        st.metric(label="현재까지 매칭 성공 건수", value=job.state["matched"])
+    if job.state.get("rows"):
+        import pandas as pd
+
+        st.dataframe(pd.DataFrame(job.state["rows"]), use_container_width=True, height=250)
+    with st.expander("로그 메시지", expanded=False):
+        _render_log_box(job.log_lines)
+    if not job.running:
+        st.rerun()
+
+
 def _cleanup_temp_dirs():
     temp_dirs = st.session_state.get("temp_dirs", [])
     for d in temp_dirs:
@@ -70,32 +368,8 @@ def _cleanup_temp_dirs():
     st.session_state["temp_dirs"] = []
 
 
-def _extract_zip_recursive(zip_file: Path, dest_dir: Path, max_depth: int = 3) -> None:
-    """ZIP 내부에 중첩된 ZIP이 있을 때까지 안전하게 풀어준다."""
-    dest_dir = dest_dir.resolve()
-    queue: list[tuple[Path, int]] = [(zip_file, 0)]
-
-    def _safe_extract(zf: zipfile.ZipFile) -> None:
-        for info in zf.infolist():
-            target = (dest_dir / info.filename).resolve()
-            if not str(target).startswith(str(dest_dir)):
-                raise ValueError("ZIP 내 경로가 대상 폴더 밖으로 벗어납니다.")
-        zf.extractall(dest_dir)
-
-    while queue:
-        src, depth = queue.pop()
-        if depth > max_depth:
-            raise ValueError("ZIP 중첩 깊이 한도를 초과했습니다.")
-        with zipfile.ZipFile(src) as zf:
-            _safe_extract(zf)
-            for info in zf.infolist():
-                if info.filename.lower().endswith(".zip"):
-                    nested = dest_dir / info.filename
-                    if nested.is_file():
-                        queue.append((nested, depth + 1))
-
-
 def main():
+    startup.mark("script_start")
     st.set_page_config(page_title="PT 차트 매칭 도구", layout="wide")
     st.title("PT 차트 매칭 도구")
     st.write("왼쪽 사이드바에서 PDF/엑셀 입력 방식을 선택한 뒤 실행하세요.")
@@ -114,7 +388,7 @@ def main():
 
         pdf_mode = st.radio(
             "PDF 입력 방식",
-            ["ZIP 업로드", "경로 스캔 (재귀)", "절대경로 입력"],
+            ["ZIP 업로드", "경로 스캔 (재귀)", "절대경로 입력", "방문 색인 (PDF 없이)"],
             index=0,
             key="pdf_mode",
         )
@@ -129,14 +403,41 @@ def main():
                 height=90,
                 help="여러 경로를 입력하면 모두 재귀적으로 스캔합니다.",
             )
+            st.text_input(
+                "제외 패턴 (쉼표 구분)",
+                key="scan_exclude",
+                placeholder="old, *_draft.pdf",
+                help="이름(또는 /가 있으면 루트 기준 경로)이 맞는 폴더와 파일은 건너뜁니다.",
+            )
+            st.number_input(
+                "하위 폴더 깊이",
+                min_value=0,
+                value=None,
+                step=1,
+                key="scan_max_depth",
+                placeholder="제한 없음",
+                help="0이면 루트 바로 아래 PDF만 찾습니다. 비워 두면 모든 하위 폴더를 찾습니다.",
+            )
         elif pdf_mode == "ZIP 업로드":
             pdf_zip = st.file_uploader(
                 "PDF ZIP 업로드",
                 type=["zip"],
                 accept_multiple_files=False,
                 key="pdf_zip_upload",
-                help="ZIP 내 모든 PDF를 자동으로 풀어 처리합니다.",
+                help="ZIP(중첩 ZIP 포함) 내 모든 PDF를 디스크에 풀지 않고 바로 처리합니다.",
+            )
+            st.number_input(
+                "ZIP 메모리 버퍼 (MB)",
+                min_value=8,
+                value=DEFAULT_ZIP_BUFFER_MB,
+                step=8,
+                key="zip_buffer_mb",
+                help="중첩 ZIP과 동시에 처리 중인 PDF를 메모리에 올리는 최대 크기입니다.",
             )
+        elif pdf_mode == "방문 색인 (PDF 없이)":
+            from visit_index import DEFAULT_INDEX_PATH
+
+            st.caption(f"PDF를 읽지 않고 이전 실행에서 저장한 방문 색인으로 매칭합니다. ({DEFAULT_INDEX_PATH})")
         else:
             pdf_dir_input = st.text_input(
                 "PDF 폴더 절대경로 (기존 방식)",
@@ -170,6 +471,64 @@ def main():
 
         sheet_name = st.text_input("시트명", value=default_sheet, key="sheet_name")
         columns = st.text_input("열 범위 (예: A:G)", value=default_cols, key="columns")
+        workers = st.number_input(
+            "병렬 파싱 프로세스 수",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=1,
+            step=1,
+            key="workers",
+            help="2 이상이면 여러 PDF를 동시에 파싱합니다.",
+        )
+        engine = st.radio(
+            "PDF 추출 엔진",
+            ["tables", "words"],
+            horizontal=True,
+            key="engine",
+            help="words: 단어 좌표로 빠르게 추출하고, 실패한 페이지만 표 감지(tables)로 처리합니다.",
+        )
+        use_cache = st.checkbox(
+            "파싱 캐시 사용",
+            value=True,
+            key="use_cache",
+            help=f"변경되지 않은 PDF는 다시 파싱하지 않습니다. ({DEFAULT_CACHE_PATH})",
+        )
+        profile = st.checkbox(
+            "단계별 시간 측정",
+            value=False,
+            key="profile",
+            help="파일 탐색/PDF 열기/표 감지/엑셀 읽기/매칭 등 단계별 소요 시간과 가장 느린 파일을 기록합니다.",
+        )
+        fuzzy = st.checkbox(
+            "유사 매칭 (2차)",
+            value=False,
+            key="fuzzy",
+            help="이름 오타/순서, 진단명 표기 차이로 매칭되지 않은 행을 생년월일·진료일이 같은 후보 중에서 "
+                 "유사도로 매칭합니다. 결과에 Match/Confidence/Match Reason 열이 추가됩니다.",
+        )
+        bounded = st.checkbox(
+            "메모리 제한 모드",
+            value=False,
+            key="bounded",
+            help="PDF를 별도 작업 프로세스에서 파싱하고 일정 파일 수/메모리마다 교체합니다. "
+                 "너무 크거나 오래 걸리는 PDF는 건너뛰고 로그에 남깁니다. (대량 처리용, 시작이 조금 느림)",
+        )
+        index_mode = pdf_mode == "방문 색인 (PDF 없이)"
+        save_index = index_mode or st.checkbox(
+            "방문 색인에 저장",
+            value=False,
+            key="save_index",
+            help="추출 결과를 방문 색인에 쌓아 두면 다음 주 시트를 PDF 없이 매칭하거나 환자별로 조회할 수 있습니다.",
+        )
+        watch_mode = False
+        if pdf_mode not in ("ZIP 업로드", "방문 색인 (PDF 없이)"):
+            watch_mode = st.checkbox(
+                "감시 모드",
+                value=False,
+                key="watch_mode",
+                help="PDF 폴더와 입력 엑셀(절대경로)을 계속 감시해 새 PDF만 파싱합니다. "
+                     "실행을 다시 누르면 그동안 반영된 최신 결과를 가져옵니다.",
+            )
 
         col_run, col_stop = st.columns(2)
         run_clicked = col_run.button("실행", type="primary", use_container_width=True)
@@ -179,22 +538,35 @@ def main():
         st.session_state.results = None
     if "log_lines" not in st.session_state:
         st.session_state.log_lines = []
-    if "stop_requested" not in st.session_state:
-        st.session_state.stop_requested = False
     if "run_ts" not in st.session_state:
         st.session_state.run_ts = ""
     if "pdf_paths_raw" not in st.session_state:
         st.session_state.pdf_paths_raw = ""
+    if "timings" not in st.session_state:
+        st.session_state.timings = None
+
+    # 감시 모드를 끄면 이 세션에서 시작한 감시를 종료
+    if not watch_mode and st.session_state.get("watch_key"):
+        from watcher import stop_watcher
 
-    if stop_clicked:
-        st.session_state.stop_requested = True
-        st.warning("중지 요청됨: 다음 작업 지점에서 중단합니다.")
+        stop_watcher(st.session_state.pop("watch_key"))
+
+    # 새로고침으로 세션이 바뀌어도 URL의 job 값으로 실행 중인 작업에 다시 연결
+    job = get_job(st.session_state.get("job_id") or st.query_params.get("job"))
+
+    if stop_clicked and job is not None and job.running:
+        job.cancel()
+        st.warning("중지 요청됨: 현재 파일 처리 후 중단합니다.")
+
+    if run_clicked and job is not None and job.running:
+        st.warning("이미 실행 중인 작업이 있습니다. 중지하거나 끝난 뒤 다시 실행하세요.")
+        run_clicked = False
 
     if run_clicked:
         # 이전 임시 폴더 정리
         _cleanup_temp_dirs()
 
-        resolved_pdf_dir: str | list[str] | None = None
+        resolved_pdf_dir: str | list[str] | ZipPdfSource | None = None
         resolved_xlsx: str | None = None
 
         if pdf_mode == "경로 스캔 (재귀)":
@@ -207,17 +579,13 @@ def main():
             if not pdf_zip:
                 st.error("PDF ZIP 파일을 업로드해 주세요.")
                 return
-            tmp_dir = Path(tempfile.mkdtemp(prefix="tricare_pdf_zip_"))
-            try:
-                upload_zip_path = tmp_dir / (pdf_zip.name or "upload.zip")
-                upload_zip_path.write_bytes(pdf_zip.getvalue())
-                _extract_zip_recursive(upload_zip_path, tmp_dir, max_depth=5)
-            except (zipfile.BadZipFile, ValueError) as e:
-                st.error(f"ZIP 해제 실패: {e}")
-                shutil.rmtree(tmp_dir, ignore_errors=True)
+            # 엑셀 입력 확인 후 실행 직전에 연다 (ZipPdfSource)
+        elif index_mode:
+            from visit_index import DEFAULT_INDEX_PATH
+
+            if not DEFAULT_INDEX_PATH.is_file():
+                st.error("방문 색인이 없습니다. 먼저 '방문 색인에 저장'을 켜고 PDF로 실행해 주세요.")
                 return
-            resolved_pdf_dir = str(tmp_dir)
-            st.session_state.temp_dirs.append(tmp_dir)
         else:
             pdf_dir_value = st.session_state.get("pdf_dir_input", "")
             if not pdf_dir_value:
@@ -225,6 +593,10 @@ def main():
                 return
             resolved_pdf_dir = pdf_dir_value
 
+        if watch_mode and excel_mode == "파일 업로드":
+            st.error("감시 모드는 입력 엑셀을 절대경로로 입력해야 합니다.")
+            return
+
         if excel_mode == "파일 업로드":
             if not excel_file:
                 st.error("입력 엑셀 파일을 업로드해 주세요.")
@@ -241,58 +613,90 @@ def main():
                 return
             resolved_xlsx = xlsx_value
 
+        if pdf_mode == "ZIP 업로드":
+            from processor import ZipPdfSource
+
+            try:
+                resolved_pdf_dir = ZipPdfSource(
+                    pdf_zip,
+                    name=pdf_zip.name or "upload.zip",
+                    max_depth=5,
+                    buffer_size=int(st.session_state.get("zip_buffer_mb", DEFAULT_ZIP_BUFFER_MB)) * 1024 * 1024,
+                )
+            except (zipfile.BadZipFile, ValueError) as e:
+                st.error(f"ZIP 읽기 실패: {e}")
+                return
+
         st.session_state.log_lines = []
         st.session_state.results = None
+        st.session_state.timings = None
         st.session_state.run_ts = dt.datetime.now().strftime("%Y%m%d%H%M%S")
-        st.session_state.stop_requested = False
-
-        progress = st.progress(0.0, text="대기 중")
-        status_box = st.expander("로그 메시지", expanded=False)
-        status_log_placeholder = status_box.empty()
-
-        def render_status_logs():
-            html = """
-            <div style="height:200px; overflow-y:auto; background:#f0f0f0; color:#111;
-                        padding:8px; border-radius:4px; font-family:monospace;
-                        white-space:pre-wrap; border:1px solid #d0d0d0;">{logs}</div>
-            """.format(logs="\n".join(st.session_state.log_lines))
-            status_log_placeholder.markdown(html, unsafe_allow_html=True)
-
-        def append_log(msg: str):
-            st.session_state.log_lines.append(msg)
-            st.session_state.log_lines = st.session_state.log_lines[-500:]
-            render_status_logs()
-
-        def on_progress(done: int, total: int, file: Path, rows: int):
-            pct = done / total if total else 1
-            progress.progress(pct, text=f"{done}/{total} 처리 중: {file.name} (rows={rows})")
-            parent_name = file.parent.name or file.parent
-            msg = f"{done}/{total} | {parent_name}\\{file.name} | rows={rows}"
-            append_log(msg)
 
-        try:
-            with st.spinner("처리 중..."):
-                df_pdf, df_excel, matched = run_matching(
-                    pdf_dir=resolved_pdf_dir,
-                    input_xlsx=resolved_xlsx,
-                    sheet_name=sheet_name,
-                    columns=columns,
-                    progress_cb=on_progress,
-                    stop_flag=lambda: st.session_state.get("stop_requested", False),
-                )
-            st.session_state.results = (df_pdf, df_excel, matched)
-            append_log(f"완료 - 매칭 성공: {matched}건")
-        except Exception as e:
-            err_msg = f"오류: {e}"
-            st.error(err_msg)
-            append_log(err_msg)
-            return
+        if watch_mode:
+            from watcher import stop_watcher, watcher_key
+
+            key = watcher_key(resolved_pdf_dir, resolved_xlsx, sheet_name, columns, engine)
+            if st.session_state.get("watch_key") not in (None, key):
+                stop_watcher(st.session_state.watch_key)
+            st.session_state.watch_key = key
+            job_target = _watch_job
+        else:
+            scan = None
+            if pdf_mode == "경로 스캔 (재귀)":
+                exclude = [p.strip() for p in st.session_state.get("scan_exclude", "").split(",") if p.strip()]
+                max_depth = st.session_state.get("scan_max_depth")
+                scan = ScanOptions(exclude=tuple(exclude), max_depth=None if max_depth is None else int(max_depth))
+            job_target = partial(
+                _matching_job, profile=profile, use_index=save_index, fuzzy=fuzzy, bounded=bounded, scan=scan
+            )
+
+        job = start_job(
+            partial(
+                job_target,
+                pdf_dir=resolved_pdf_dir,
+                input_xlsx=resolved_xlsx,
+                sheet_name=sheet_name,
+                columns=columns,
+                workers=int(workers),
+                engine=engine,
+                use_cache=use_cache,
+            )
+        )
+        st.session_state.job_id = job.id
+        st.query_params["job"] = job.id
+
+    if job is not None and job.running:
+        st.fragment(_job_panel, run_every=JOB_POLL_SEC)(job.id)
+    elif job is not None:
+        # 끝난 작업의 결과를 세션으로 옮기고 연결 해제
+        job.poll()
+        st.session_state.log_lines = list(job.log_lines)
+        st.session_state.timings = job.state.get("timings")
+        if job.status == "done":
+            st.session_state.results = job.result
+            if not st.session_state.run_ts:
+                st.session_state.run_ts = dt.datetime.fromtimestamp(job.started_at).strftime("%Y%m%d%H%M%S")
+        elif job.status == "cancelled":
+            st.warning("사용자 중지로 작업이 중단되었습니다.")
+        else:
+            st.error(f"오류: {job.error}")
+        st.session_state.job_id = None
+        st.query_params.pop("job", None)
+
+    if st.session_state.log_lines and (job is None or not job.running):
+        with st.expander("로그 메시지", expanded=False):
+            _render_log_box(st.session_state.log_lines)
 
     if st.session_state.results:
-        df_pdf, df_excel, matched = st.session_state.results
-        _render_results(df_pdf, df_excel, matched, ts=st.session_state.get("run_ts"))
+        _render_results(st.session_state.results, ts=st.session_state.get("run_ts"))
+    if st.session_state.timings:
+        st.divider()
+        _render_timings(st.session_state.timings, ts=st.session_state.get("run_ts"))
 
 
 if __name__ == "__main__":
     main()
+    startup.report_first_render()
+    # 첫 화면을 다 보낸 뒤 시작해야 화면 그리기와 GIL을 다투지 않는다. 사용자가 입력하는 동안 끝난다.
+    startup.preload()
 
@@ -0,0 +1,263 @@
+"""
+브라우저 없이 전체 매칭을 실행하는 배치 명령. (예약 작업/서버용)
+Streamlit을 import하지 않으므로 바로 시작한다.
+
+종료 코드:
+  0  성공
+  1  처리 중 오류 (PDF/엑셀 읽기 실패 등)
+  2  입력 오류 (경로/시트/열 범위/헤더/출력 형식: processor.InputError)
+  3  완료했지만 매칭 성공 0건
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from discovery import DEFAULT_SCAN_WORKERS, ScanOptions
+from parse_cache import DEFAULT_CACHE_PATH, ParseCache
+from profiling import StageTimings, stage
+from processor import (
+    EXPORT_FORMATS,
+    PARSE_ENGINES,
+    InputError,
+    ParseLimits,
+    ZipPdfSource,
+    export_table,
+    run_matching,
+)
+from visit_index import VisitIndex
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_MATCH = 3
+
+
+@contextlib.contextmanager
+def _stdout_to_stderr() -> Iterator[None]:
+    """
+    실행 중 라이브러리/작업 프로세스의 print가 stdout의 JSON 요약에 섞이지 않도록
+    fd 수준에서 stdout을 stderr로 돌린다. (자식 프로세스에도 상속됨)
+    """
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def _output_format(path: str, fmt: str | None) -> str:
+    fmt = fmt or Path(path).suffix.lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise InputError(f"지원하지 않는 출력 형식입니다: {path} (xlsx/csv/parquet)")
+    return fmt
+
+
+def run_batch(args: argparse.Namespace) -> Dict[str, Any]:
+    """매칭을 실행하고 결과 파일을 저장한 뒤 요약(dict)을 돌려준다."""
+    fmt = _output_format(args.output, args.format)
+    pdf_fmt = _output_format(args.pdf_output, args.format) if args.pdf_output else None
+
+    roots = args.pdf_root
+    if not roots and not args.index:
+        raise InputError("PDF 루트 또는 --index가 필요합니다.")
+    if not roots:
+        pdf_dir: Any = None
+    elif len(roots) == 1 and roots[0].lower().endswith(".zip"):
+        try:
+            pdf_dir = ZipPdfSource(roots[0], name=Path(roots[0]).name, max_depth=5)
+        except (FileNotFoundError, zipfile.BadZipFile) as e:
+            raise InputError(f"ZIP 파일을 열 수 없습니다: {roots[0]} ({e})") from e
+    else:
+        pdf_dir = roots if len(roots) > 1 else roots[0]
+
+    cache = None if args.no_cache or not roots else ParseCache(args.cache)
+    index = VisitIndex(args.index) if args.index else None
+    page_stats: Dict[str, int] = {}
+    match_stats: Dict[str, int] = {}
+    timings = StageTimings() if args.timings or args.timings_json else None
+    resource_stats: Dict[str, Any] = {}
+    duplicate_files: Dict[str, Any] = {}
+    limits = None
+    if args.bounded:
+        limits = ParseLimits(
+            max_tasks_per_child=args.recycle_after,
+            max_rss_mb=args.max_rss_mb,
+            max_file_mb=args.max_file_mb,
+            max_pages=args.max_pages,
+            timeout_sec=args.file_timeout,
+        )
+    scan = ScanOptions(
+        include=tuple(args.include or ScanOptions().include),
+        exclude=tuple(args.exclude or ()),
+        max_depth=args.max_depth,
+        workers=args.scan_workers,
+    )
+    n_files = 0
+
+    def on_progress(done: int, total: int, file: Path, rows: int):
+        nonlocal n_files
+        n_files = total
+        if args.verbose:
+            print(f"{done}/{total} | {file} | rows={rows}", file=sys.stderr, flush=True)
+
+    t0 = time.perf_counter()
+    try:
+        df_pdf, df_excel, matched = run_matching(
+            pdf_dir=pdf_dir,
+            input_xlsx=args.excel,
+            sheet_name=args.sheet,
+            columns=args.columns,
+            progress_cb=on_progress,
+            workers=args.workers,
+            cache=cache,
+            engine=args.engine,
+            page_stats=page_stats,
+            match_stats=match_stats,
+            timings=timings,
+            index=index,
+            fuzzy=args.fuzzy,
+            limits=limits,
+            resource_stats=resource_stats,
+            dedup=not args.no_dedup,
+            duplicate_files=duplicate_files,
+            scan=scan,
+        )
+    finally:
+        if isinstance(pdf_dir, ZipPdfSource):
+            pdf_dir.close()
+        if cache is not None:
+            cache.close()
+        if index is not None:
+            index.close()
+    t_match = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with stage(timings, "export"):
+        export_table(df_excel, args.output, fmt)
+        if args.pdf_output:
+            export_table(df_pdf, args.pdf_output, pdf_fmt)
+    t_export = time.perf_counter() - t0
+
+    profile = None
+    if timings is not None:
+        timings.finish()
+        profile = timings.to_dict()
+        if args.timings_json:
+            Path(args.timings_json).write_text(timings.to_json(), encoding="utf-8")
+
+    return {
+        "status": "ok" if matched else "no_match",
+        "output": str(args.output),
+        "pdf_output": str(args.pdf_output) if args.pdf_output else None,
+        "pdf_files": n_files,
+        "pdf_records": len(df_pdf),
+        "duplicates": duplicate_files,
+        "excel_rows": len(df_excel),
+        "matched": matched,
+        "ambiguous": match_stats.get("ambiguous", 0),
+        "unmatched": match_stats.get("unmatched", 0),
+        "fuzzy": match_stats.get("fuzzy", 0),
+        "pages": {
+            "parsed": page_stats.get("parsed", 0),
+            "skipped": page_stats.get("skipped", 0),
+            "template_hits": page_stats.get("template_hits", 0),
+            "template_misses": page_stats.get("template_misses", 0),
+        },
+        "cache": {"hits": cache.hits, "misses": cache.misses} if cache is not None else None,
+        "memory": resource_stats,
+        "timings_sec": {"matching": round(t_match, 3), "export": round(t_export, 3)},
+        "profile": profile,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="PT 차트 매칭 배치 실행 (결과 요약은 stdout에 JSON으로 출력)",
+        epilog="예시:\n  python batch.py C:\\\\pdf_a C:\\\\pdf_b --excel C:\\\\input.xlsx "
+               "--sheet \"Jun 30 _ Jul 5\" --output C:\\\\out\\\\merge.xlsx\n"
+               "  python batch.py C:\\\\charts.zip --excel C:\\\\input.xlsx --sheet S1 --output merge.parquet",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "pdf_root", nargs="*", help="PDF 루트 절대경로 (여러 개 가능) 또는 ZIP 파일 1개. 생략하면 --index로만 매칭"
+    )
+    parser.add_argument("--excel", required=True, help="입력 엑셀 절대경로")
+    parser.add_argument("--sheet", required=True, help="시트명")
+    parser.add_argument("--columns", default="A:G", help="열 범위 (기본 A:G)")
+    parser.add_argument("--output", required=True, help="병합 결과 저장 경로 (.xlsx/.csv/.parquet)")
+    parser.add_argument("--pdf-output", default=None, help="PDF 추출 결과 저장 경로 (선택)")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default=None, help="출력 형식 (기본: 확장자로 판단)")
+    parser.add_argument("--workers", type=int, default=1, help="병렬 파싱 프로세스 수 (기본 1)")
+    parser.add_argument("--engine", choices=list(PARSE_ENGINES), default="tables", help="추출 엔진")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH), help="파싱 캐시 SQLite 경로")
+    parser.add_argument("--no-cache", action="store_true", help="파싱 캐시 사용 안 함")
+    parser.add_argument(
+        "--include", action="append", default=None, metavar="GLOB",
+        help="포함할 파일 패턴 (여러 번 가능, 기본 *.pdf). /가 있으면 루트 기준 상대 경로와 비교",
+    )
+    parser.add_argument(
+        "--exclude", action="append", default=None, metavar="GLOB",
+        help="제외할 파일/폴더 패턴 (여러 번 가능, 예: --exclude old --exclude \"*_draft.pdf\")",
+    )
+    parser.add_argument("--max-depth", type=int, default=None, help="하위 폴더 탐색 깊이 (0: 루트 바로 아래만, 기본 제한 없음)")
+    parser.add_argument("--scan-workers", type=int, default=DEFAULT_SCAN_WORKERS,
+                        help=f"동시에 읽는 폴더 수 (기본 {DEFAULT_SCAN_WORKERS}, 네트워크 공유 폴더용)")
+    parser.add_argument(
+        "--no-dedup", action="store_true",
+        help="내용이 같은 PDF도 모두 파싱 (기본: 한 번만 파싱하고 요약의 duplicates에 중복 경로 기록)",
+    )
+    parser.add_argument(
+        "--index", default=None,
+        help="방문 색인 SQLite 경로. PDF 루트와 함께 주면 추출 결과를 저장하고, 단독이면 PDF 없이 색인으로 매칭",
+    )
+    parser.add_argument(
+        "--fuzzy", action="store_true",
+        help="정확히 매칭되지 않은 행을 생년월일/진료일이 같은 후보와 유사도로 2차 매칭 (Match/Confidence 열 추가)",
+    )
+    parser.add_argument(
+        "--bounded", action="store_true",
+        help="메모리 제한 파싱: 작업 프로세스에서 파싱하고 주기적으로 교체, 큰/멈춘 PDF는 건너뜀 (요약의 memory.skipped_files)",
+    )
+    defaults = ParseLimits()
+    parser.add_argument("--recycle-after", type=int, default=defaults.max_tasks_per_child,
+                        help=f"--bounded: 작업 프로세스 교체 주기 (파일 수, 기본 {defaults.max_tasks_per_child})")
+    parser.add_argument("--max-rss-mb", type=float, default=defaults.max_rss_mb,
+                        help=f"--bounded: 작업 프로세스 RSS 상한 MB (기본 {defaults.max_rss_mb:g})")
+    parser.add_argument("--max-file-mb", type=float, default=defaults.max_file_mb,
+                        help=f"--bounded: 이보다 큰 PDF는 건너뜀 (기본 {defaults.max_file_mb:g})")
+    parser.add_argument("--max-pages", type=int, default=defaults.max_pages,
+                        help=f"--bounded: 페이지가 이보다 많은 PDF는 건너뜀 (기본 {defaults.max_pages})")
+    parser.add_argument("--file-timeout", type=float, default=defaults.timeout_sec,
+                        help=f"--bounded: 파일당 시간 상한 초 (기본 {defaults.timeout_sec:g})")
+    parser.add_argument("--timings", action="store_true", help="단계별 소요 시간을 요약 JSON의 profile에 포함")
+    parser.add_argument("--timings-json", default=None, help="단계별 소요 시간을 별도 JSON 파일로 저장")
+    parser.add_argument("-v", "--verbose", action="store_true", help="파일별 진행 상황을 stderr에 출력")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    try:
+        with _stdout_to_stderr():
+            summary = run_batch(args)
+        code = EXIT_OK if summary["matched"] else EXIT_NO_MATCH
+    except InputError as e:
+        summary, code = {"status": "usage_error", "error": str(e)}, EXIT_USAGE
+    except Exception as e:
+        summary, code = {"status": "error", "error": f"{type(e).__name__}: {e}"}, EXIT_FAILED
+    summary.setdefault("timings_sec", {})["total"] = round(time.perf_counter() - t0, 3)
+    summary["exit_code"] = code
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
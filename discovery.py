@@ -0,0 +1,170 @@
+"""
+os.scandir 기반 PDF 파일 탐색.
+
+여러 루트와 하위 폴더를 스레드 풀에서 동시에 읽고(네트워크 공유 폴더의 디렉터리 조회 지연을 겹침),
+찾은 파일은 전체 목록을 기다리지 않고 바로 돌려준다. 폴더를 읽는 순서는 동시적이지만 파일은 항상
+루트 순서 -> 폴더 안(이름순) 파일 -> 하위 폴더(이름순)의 깊이 우선 순서로 나오므로 실행마다 같다.
+"""
+import fnmatch
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Tuple
+
+DEFAULT_SCAN_WORKERS = 8
+
+
+class ScanOptions(NamedTuple):
+    """
+    파일 탐색 설정.
+    패턴에 "/"가 있으면 루트 기준 상대 경로(/ 구분)와, 없으면 이름과 비교한다. (대소문자는 OS 규칙, rglob과 같음)
+    """
+    include: Tuple[str, ...] = ("*.pdf",)  # 이 중 하나와 맞는 파일만
+    exclude: Tuple[str, ...] = ()  # 맞는 파일은 제외하고, 맞는 폴더는 들어가지 않음
+    max_depth: int | None = None  # 루트 바로 아래 파일이 깊이 0. None이면 제한 없음
+    workers: int = DEFAULT_SCAN_WORKERS  # 동시에 읽는 폴더 수
+
+
+def _matches(patterns: Tuple[str, ...], name: str, rel: str) -> bool:
+    return any(fnmatch.fnmatch(rel if "/" in p else name, p) for p in patterns)
+
+
+class _Dir:
+    __slots__ = ("path", "rel", "depth", "files", "subdirs", "done")
+
+    def __init__(self, path: str, rel: str, depth: int):
+        self.path = path
+        self.rel = rel
+        self.depth = depth
+        self.files: List[Path] = []
+        self.subdirs: List["_Dir"] = []
+        self.done = threading.Event()
+
+
+class FileScanner:
+    """
+    roots 아래 파일을 ScanOptions에 따라 찾는다. 한 번만 순회할 수 있다.
+    순회를 시작하면 모든 폴더를 백그라운드에서 읽어 나가고(found가 계속 늘어남),
+    순회는 앞선 폴더가 읽히는 대로 파일을 하나씩 돌려준다.
+    읽을 수 없는 하위 폴더는 건너뛰고 errors에 (경로, 오류)로 남긴다.
+    """
+
+    def __init__(
+        self,
+        roots: List[Path],
+        options: ScanOptions | None = None,
+        stop_flag: Callable[[], bool] | None = None,
+    ):
+        self.roots = list(roots)
+        self.options = options or ScanOptions()
+        self.stop_flag = stop_flag
+        self.found = 0  # 지금까지 찾은 고유 경로 수 (순회보다 앞설 수 있음)
+        self.repeats = 0  # 겹치는 루트 때문에 다시 찾은 같은 경로 수 (순회에는 그대로 나옴)
+        self._seen: set[str] = set()
+        self.finished = False  # 모든 폴더를 읽었는지
+        self.errors: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._started = False
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _submit(self, node: _Dir) -> None:
+        with self._lock:
+            if self._closed:
+                node.done.set()
+                return
+            self._pending += 1
+        try:
+            self._executor.submit(self._scan, node)
+        except RuntimeError:  # 닫는 중
+            node.done.set()
+            self._finish_one()
+
+    def _finish_one(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self.finished = True
+
+    def _scan(self, node: _Dir) -> None:
+        opts = self.options
+        try:
+            with os.scandir(node.path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            with self._lock:
+                self.errors.append((node.path, str(e)))
+            entries = []
+        files: List[Path] = []
+        subdirs: List[_Dir] = []
+        for entry in entries:
+            rel = f"{node.rel}/{entry.name}" if node.rel else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if opts.exclude and _matches(opts.exclude, entry.name, rel):
+                continue
+            if is_dir:
+                if opts.max_depth is None or node.depth < opts.max_depth:
+                    subdirs.append(_Dir(entry.path, rel, node.depth + 1))
+            elif is_file and _matches(opts.include, entry.name, rel):
+                files.append(Path(entry.path))
+        node.files = files
+        node.subdirs = subdirs
+        with self._lock:
+            for file in files:
+                key = os.path.normcase(str(file))
+                if key in self._seen:
+                    self.repeats += 1
+                else:
+                    self._seen.add(key)
+                    self.found += 1
+        for child in subdirs:
+            self._submit(child)
+        node.done.set()
+        self._finish_one()
+
+    def _wait(self, node: _Dir) -> None:
+        while not node.done.wait(0.1):
+            if self.stop_flag and self.stop_flag():
+                raise RuntimeError("사용자 중지")
+
+    def __iter__(self) -> Iterator[Path]:
+        if self._started:
+            raise RuntimeError("FileScanner는 한 번만 순회할 수 있습니다.")
+        self._started = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(self.options.workers, 1), thread_name_prefix="tricare-scan"
+        )
+        try:
+            stack = [_Dir(str(root), "", 0) for root in reversed(self.roots)]
+            # 루트를 모두 넣기 전에 finished가 되지 않도록 넣는 동안 하나를 더 세어 둔다.
+            self._pending = 1
+            for node in reversed(stack):
+                self._submit(node)
+            self._finish_one()
+            while stack:
+                node = stack.pop()
+                self._wait(node)
+                yield from node.files
+                stack.extend(reversed(node.subdirs))
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """남은 폴더 읽기를 취소한다. (순회를 끝내거나 generator를 닫으면 자동 호출)"""
+        with self._lock:
+            self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def scan_files(
+    roots: List[Path], options: ScanOptions | None = None, stop_flag: Callable[[], bool] | None = None
+) -> List[Path]:
+    """roots 아래 파일 전체 목록 (FileScanner 순서)"""
+    return list(FileScanner(roots, options, stop_flag))
@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+# 끝난 작업을 레지스트리에 남겨 두는 시간 (새로고침 후 결과 재연결용)
+JOB_TTL_SEC = 60 * 60
+MAX_LOG_LINES = 500
+
+
+class Job:
+    """
+    백그라운드 스레드에서 실행되는 작업.
+    작업 스레드는 log/progress/update로 이벤트를 큐에 넣고, 화면은 poll()로 꺼내 상태에 반영한다.
+    상태는 세션이 아니라 Job에 쌓이므로 브라우저를 새로고침해도 같은 작업에 다시 붙을 수 있다.
+    """
+
+    def __init__(self, target: Callable[["Job"], Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "running"  # running | done | error | cancelled
+        self.result: Any = None
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self.log_lines: List[str] = []
+        self.progress: Tuple[int, int, str] = (0, 0, "")
+        self.state: Dict[str, Any] = {}
+        self._cancel = threading.Event()
+        self._poll_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, args=(target,), name=f"tricare-job-{self.id}", daemon=True
+        )
+
+    def _run(self, target: Callable[["Job"], Any]) -> None:
+        try:
+            self.result = target(self)
+            self.status = "done"
+        except Exception as e:
+            self.error = str(e)
+            self.status = "cancelled" if self._cancel.is_set() else "error"
+            self.log(f"오류: {e}")
+        finally:
+            self.finished_at = time.time()
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    # 작업 스레드에서 호출
+    def log(self, msg: str) -> None:
+        self.events.put(("log", msg))
+
+    def set_progress(self, done: int, total: int, text: str) -> None:
+        self.events.put(("progress", (done, total, text)))
+
+    def update(self, **state: Any) -> None:
+        self.events.put(("state", state))
+
+    # 화면(스크립트 스레드)에서 호출
+    def poll(self) -> "Job":
+        with self._poll_lock:
+            while True:
+                try:
+                    kind, payload = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "log":
+                    self.log_lines.append(payload)
+                elif kind == "progress":
+                    self.progress = payload
+                elif kind == "state":
+                    self.state.update(payload)
+            del self.log_lines[:-MAX_LOG_LINES]
+        return self
+
+
+_jobs: Dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+
+
+def _prune() -> None:
+    now = time.time()
+    for job_id, job in list(_jobs.items()):
+        if job.finished_at is not None and now - job.finished_at > JOB_TTL_SEC:
+            del _jobs[job_id]
+
+
+def start_job(target: Callable[[Job], Any]) -> Job:
+    """target(job)을 새 스레드에서 실행하고 바로 Job을 돌려준다."""
+    job = Job(target)
+    with _jobs_lock:
+        _prune()
+        _jobs[job.id] = job
+    job._thread.start()
+    return job
+
+
+def get_job(job_id: str | None) -> Job | None:
+    if not job_id:
+        return None
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -1,11 +1,17 @@
+import multiprocessing
 import os
 import sys
 from pathlib import Path
 
+import startup
 from streamlit.web import cli as stcli
 
 
 if __name__ == "__main__":
+    # Let process-pool workers bootstrap inside the frozen executable.
+    multiprocessing.freeze_support()
+    startup.mark_launch("inprocess")
+
     # Ensure working directory is the folder containing the bundled files.
     base_dir = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent))
     os.chdir(base_dir)
@@ -29,6 +35,7 @@ import subprocess
 
 
 def main() -> None:
+    startup.mark_launch("subprocess")
     base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
     app_path = os.path.join(base_dir, "app.py")
 
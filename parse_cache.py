@@ -0,0 +1,149 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+DEFAULT_CACHE_PATH = Path.home() / ".tricare" / "parse_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    digest TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    rows_json TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, parser_version)
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+"""
+
+
+def file_digest(path: Path) -> str:
+    # hashlib.file_digest는 Python 3.11부터라 직접 나눠 읽는다. (README: Python 3.10+)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def bytes_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """
+    parse_pdf 결과를 SQLite에 저장하는 영구 캐시.
+    키: (파일 내용 해시, 파서 버전). mtime/크기가 그대로면 해시 계산을 생략한다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다.
+    """
+
+    def __init__(self, db_path: str | Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+
+    def __enter__(self) -> "ParseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _digest(self, path: Path) -> str:
+        st = path.stat()
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, digest FROM files WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return row[2]
+        digest = file_digest(path)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                (str(path), st.st_mtime_ns, st.st_size, digest),
+            )
+        return digest
+
+    def get(self, path: Path, parser_version: str) -> List[Dict[str, Any]] | None:
+        """캐시된 추출 결과를 돌려준다. 없으면 None."""
+        return self.lookup(self._digest(path), parser_version)
+
+    def put(self, path: Path, parser_version: str, rows: List[Dict[str, Any]]) -> None:
+        self.store(self._digest(path), parser_version, rows)
+
+    def lookup(self, digest: str, parser_version: str) -> List[Dict[str, Any]] | None:
+        """내용 해시로 직접 조회. (ZIP 멤버처럼 파일 경로가 없는 경우)"""
+        row = self._conn.execute(
+            "SELECT rows_json FROM entries WHERE digest = ? AND parser_version = ?",
+            (digest, parser_version),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with self._conn:
+            self._conn.execute(
+                "UPDATE entries SET last_used = ? WHERE digest = ? AND parser_version = ?",
+                (time.time(), digest, parser_version),
+            )
+        self.hits += 1
+        return json.loads(row[0])
+
+    def store(self, digest: str, parser_version: str, rows: List[Dict[str, Any]]) -> None:
+        rows_json = json.dumps(rows, ensure_ascii=False)
+        nbytes = len(rows_json.encode("utf-8"))
+        with self._conn:
+            old = self._conn.execute(
+                "SELECT nbytes FROM entries WHERE digest = ? AND parser_version = ?",
+                (digest, parser_version),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (digest, parser_version, rows_json, nbytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (digest, parser_version, rows_json, nbytes, time.time()),
+            )
+        self._total_bytes += nbytes - (old[0] if old else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """LRU 순서로 max_bytes 이하가 될 때까지 삭제. 남은 항목이 없는 내용 해시의 경로 기록도 지운다."""
+        excess = self._total_bytes - self.max_bytes
+        victims = []
+        for digest, version, nbytes in self._conn.execute(
+            "SELECT digest, parser_version, nbytes FROM entries ORDER BY last_used"
+        ):
+            if excess <= 0:
+                break
+            victims.append((digest, version))
+            excess -= nbytes
+            self._total_bytes -= nbytes
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM entries WHERE digest = ? AND parser_version = ?", victims
+            )
+            self._conn.execute(
+                "DELETE FROM files WHERE NOT EXISTS (SELECT 1 FROM entries WHERE entries.digest = files.digest)"
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._total_bytes}
@@ -1,17 +1,45 @@
 import datetime as dt
+import io
+import multiprocessing
+import os
 import re
-from pathlib import Path
-from typing import Any, Callable, Dict, List, Tuple
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path, PurePosixPath
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
 import json
 import argparse
 
-import fitz
 import pandas as pd
 
+from discovery import FileScanner, ScanOptions, scan_files
+from parse_cache import ParseCache, bytes_digest, file_digest
+from profiling import StageTimings, current_rss_mb, peak_rss_mb, stage
+
+# PyMuPDF(fitz)/openpyxl/xlsxwriter는 쓰는 함수 안에서 import한다.
+# 앱 시작(startup.preload)과 색인만으로 매칭하는 배치가 이들을 읽는 비용을 치르지 않도록.
+if TYPE_CHECKING:
+    import fitz
+
+    from visit_index import VisitIndex
+
 HEADER = re.compile(r"Dr\.?\s*Joung[`'’]?s\s*Clinic\s*&\s*Physical\s*Therapy\s*Center")
 VISIT_NO = re.compile(r"#\s*([0-9]+\s*(?:/\s*[0-9]+)?)")
 AUTH_NO = re.compile(r"\(\s*(AT-[^)]+)\s*\)")
 
+# parse_pdf 출력 형식이나 추출 방식이 바뀌면 올려서 기존 캐시를 무효화한다.
+PARSER_VERSION = "2"
+
 REQUIRED_EXCEL_COLS = [
     "Weekly pt. tx list",
     "Date of birth",
@@ -19,6 +47,33 @@ REQUIRED_EXCEL_COLS = [
     "Authorization number",
     "Date of Therapy",
 ]
+# 헤더 행은 시트 상단 이 행 수 안에서만 찾는다.
+HEADER_PROBE_ROWS = 50
+
+EXPORT_FORMATS: Dict[str, str] = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# ZIP 입력 시 메모리에 올리는 데이터 상한 (중첩 ZIP 버퍼, 병렬 파싱 대기 PDF 합계)
+DEFAULT_ZIP_BUFFER = 64 * 1024 * 1024
+
+# (통합문서 해시, 시트명, 열 범위) -> 헤더 처리된 DataFrame
+EXCEL_CACHE_SIZE = 4
+_excel_cache: "OrderedDict[Tuple[str, str, str], pd.DataFrame]" = OrderedDict()
+_excel_cache_lock = threading.Lock()
+
+# 표 템플릿(선택): 같은 양식의 페이지는 HEADER 배너 위치가 같으면 표/셀 좌표도 같으므로,
+# find_tables로 배운 셀 좌표에 단어를 바로 나눠 담는다. (TRICARE_TABLE_TEMPLATES=1이면 켬)
+TABLE_TEMPLATES = os.environ.get("TRICARE_TABLE_TEMPLATES", "0") == "1"
+TEMPLATE_CACHE_SIZE = 32
+TEMPLATE_RECHECK = 20  # 확인된 템플릿도 이 페이지 수마다 find_tables 결과와 다시 비교
+TEMPLATE_TOLERANCE = 1.5  # 단어가 셀 경계를 넘어도 되는 거리 (pt)
+
+# 매칭 키: PDF 컬럼과 대응하는 엑셀 컬럼 (같은 순서)
+PDF_MATCH_KEYS = ["Patient Name", "DOB", "Diagnosis/CC", "DOS"]
+EXCEL_MATCH_KEYS = ["Weekly pt. tx list", "Date of birth", "Diagnosis", "Date of Therapy"]
 
 target_fields = [
     {"name": "Patient Name", "pattern": r"\s*Patient\s*Name\s*"},
@@ -28,19 +83,50 @@ target_fields = [
     {"name": "DOS", "pattern": r"\s*DOS\s*"},
     {"name": "Visit No.", "pattern": r"\s*Visit\s*No\s*"}
 ]
+LABEL_ANY = re.compile("|".join(f"(?:{f['pattern']})" for f in target_fields), re.IGNORECASE)
+# 라벨 하나를 한 번에 분류: 그룹 이름 f<k>가 target_fields[k]를 가리킨다.
+FIELD_ANY = re.compile("|".join(f"(?P<f{k}>{f['pattern']})" for k, f in enumerate(target_fields)), re.IGNORECASE)
+# extract_data는 Patient Name이 있어야 레코드를 만들므로, 이 라벨이 없는 페이지는 건너뛴다.
+PAGE_TRIAGE = re.compile(
+    next(f["pattern"] for f in target_fields if f["name"] == "Patient Name"), re.IGNORECASE
+)
+
+PARSE_ENGINES = ("tables", "words")
+
+
+class ParseLimits(NamedTuple):
+    """
+    메모리 제한 파싱 설정. (None인 항목은 제한 없음)
+    주면 항상 작업 프로세스에서 파싱해 메모리 증가/멈춤/크래시를 본 프로세스와 분리한다.
+    """
+    max_tasks_per_child: int = 200  # 작업 프로세스 하나가 처리할 파일 수. 넘으면 새 프로세스로 교체 (Python 3.11+)
+    max_rss_mb: float | None = 1024.0  # 작업 프로세스 RSS가 넘으면 풀을 교체
+    max_file_mb: float | None = 100.0  # 넘는 PDF는 파싱하지 않음
+    max_pages: int | None = 300  # 넘는 PDF는 파싱하지 않음
+    timeout_sec: float | None = 120.0  # 파일당 시간. 페이지 사이에서 확인하고, 응답이 없으면 작업 프로세스 종료
+
+
+class InputError(ValueError):
+    """경로/시트/열 범위/헤더/출력 형식 등 입력 오류. 처리 중 데이터에서 생긴 ValueError와 구분한다."""
+
+
+class InputNotFoundError(InputError, FileNotFoundError):
+    """입력 경로의 파일/폴더가 없음"""
 
 
 def _ensure_abs_path(path_str: str, kind: str) -> Path:
     path = Path(path_str)
     if not path.is_absolute():
-        raise ValueError(f"{kind} 경로는 절대경로로 입력해야 합니다: {path_str}")
+        raise InputError(f"{kind} 경로는 절대경로로 입력해야 합니다: {path_str}")
     if kind == "file" and not path.is_file():
-        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {path_str}")
+        raise InputNotFoundError(f"파일을 찾을 수 없습니다: {path_str}")
     if kind == "dir" and not path.is_dir():
-        raise FileNotFoundError(f"폴더를 찾을 수 없습니다: {path_str}")
+        raise InputNotFoundError(f"폴더를 찾을 수 없습니다: {path_str}")
     return path
 
 
+# 같은 날짜 문자열이 차트마다 반복되므로 변환 결과를 기억한다.
+@lru_cache(maxsize=65536)
 def convert_dob(date_txt) -> str:
     for f in ("%B %d, %Y", "%b %d, %Y"):
         try:
@@ -51,6 +137,7 @@ def convert_dob(date_txt) -> str:
     return ""
 
 
+@lru_cache(maxsize=65536)
 def convert_dos(date_str) -> str:
     try:
         d = dt.datetime.strptime(date_str, "%m/%d/%Y")
@@ -65,46 +152,177 @@ def normalize_spaces(text: pd.Series) -> pd.Series:
     return cleaned.where(~is_na, "")
 
 
-def _read_excel_with_header_detection(
-    input_path: Path, sheet_name: str, usecols: str
-) -> pd.DataFrame:
+def _parse_usecols(usecols: str) -> List[int]:
+    """'A:G', 'A,C:E' 형식의 열 범위를 0부터 시작하는 열 번호 목록으로 바꾼다."""
+    from openpyxl.utils import column_index_from_string
+
+    cols: List[int] = []
+    try:
+        for part in usecols.replace(" ", "").upper().split(","):
+            if not part:
+                continue
+            if ":" in part:
+                first, last = part.split(":", 1)
+                cols.extend(range(column_index_from_string(first) - 1, column_index_from_string(last)))
+            else:
+                cols.append(column_index_from_string(part) - 1)
+    except ValueError:
+        raise InputError(f"열 범위 형식이 올바르지 않습니다: {usecols}") from None
+    if not cols:
+        raise InputError(f"열 범위 형식이 올바르지 않습니다: {usecols}")
+    return sorted(set(cols))
+
+
+def _iter_sheet_rows(input_path: Path, sheet_name: str, usecols: str) -> Iterator[tuple]:
+    """시트의 행을 위에서부터 usecols 열만 하나씩 돌려준다. (xlsx는 read-only 스트리밍)"""
+    if input_path.suffix.lower() == ".xls":
+        _parse_usecols(usecols)  # 형식 오류를 xlsx와 같은 InputError로
+        with pd.ExcelFile(input_path) as book:
+            if sheet_name not in book.sheet_names:
+                raise InputError(f"엑셀에서 시트를 찾을 수 없습니다: {sheet_name}")
+            df_raw = pd.read_excel(book, sheet_name=sheet_name, usecols=usecols, header=None)
+        yield from df_raw.itertuples(index=False, name=None)
+        return
+
+    from openpyxl import load_workbook
+
+    cols = _parse_usecols(usecols)
+    wb = load_workbook(input_path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise InputError(f"엑셀에서 시트를 찾을 수 없습니다: {sheet_name}")
+        ws = wb[sheet_name]
+        # 잘못 기록된 dimension 정보 때문에 행이 잘리지 않도록 초기화
+        ws.reset_dimensions()
+        first = cols[0]
+        for row in ws.iter_rows(min_col=first + 1, max_col=cols[-1] + 1, values_only=True):
+            yield tuple(row[c - first] if c - first < len(row) else None for c in cols)
+    finally:
+        wb.close()
+
+
+def _find_header_row(rows: Iterator[tuple]) -> Tuple[int, List[str]]:
     """
-    의미 없는 상단 행이 있어도 실제 헤더가 있는 행을 찾아서 DataFrame을 생성한다.
-    요구 헤더: REQUIRED_EXCEL_COLS
+    상단 HEADER_PROBE_ROWS행 안에서 REQUIRED_EXCEL_COLS가 모두 있는 행을 찾아 (행 번호, 헤더 값)을 돌려준다.
+    rows는 헤더 행 다음부터 이어서 읽을 수 있다. 못 찾으면 가장 가까운 행에 없는 헤더를 알려 준다.
     """
-    df_raw = pd.read_excel(input_path, sheet_name=sheet_name, usecols=usecols, header=None)
+    required = {req.lower(): req for req in REQUIRED_EXCEL_COLS}
+    missing = list(REQUIRED_EXCEL_COLS)
+    for idx, row in enumerate(islice(rows, HEADER_PROBE_ROWS)):
+        values = {str(v).strip().lower() for v in row if pd.notna(v)}
+        row_missing = [req for key, req in required.items() if key not in values]
+        if not row_missing:
+            return idx, [str(v).strip() if pd.notna(v) else "" for v in row]
+        if len(row_missing) < len(missing):
+            missing = row_missing
+    raise InputError(
+        f"엑셀 상단 {HEADER_PROBE_ROWS}행 안에서 필요한 헤더 행을 찾지 못했습니다. "
+        f"(없는 열: {', '.join(missing)} / 시트명과 열 범위를 확인하세요)"
+    )
 
-    def _is_header_row(row: pd.Series) -> bool:
-        values = [str(v).strip().lower() for v in row.tolist() if pd.notna(v)]
-        return all(any(val == req.lower() for val in values) for req in REQUIRED_EXCEL_COLS)
 
-    header_idx = None
-    for idx, row in df_raw.iterrows():
-        if _is_header_row(row):
-            header_idx = idx
-            break
-    if header_idx is None:
-        raise ValueError("엑셀에서 필요한 헤더 행을 찾지 못했습니다. (Weekly pt. tx list 등)")
+def _sheet_frame(
+    rows: Iterator[tuple], header_idx: int, header_values: List[str], cancel: threading.Event | None = None
+) -> pd.DataFrame:
+    # 헤더 다음 행부터 이어서 읽으며 전체 빈 행은 제외
+    index, data = [], []
+    for idx, row in enumerate(rows, start=header_idx + 1):
+        if cancel is not None and cancel.is_set():
+            raise RuntimeError("엑셀 읽기가 취소되었습니다.")
+        if any(pd.notna(v) for v in row):
+            index.append(idx)
+            data.append(row)
+    df_excel = pd.DataFrame(data, columns=header_values, index=index)
 
-    header_values = [str(v).strip() if pd.notna(v) else "" for v in df_raw.iloc[header_idx].tolist()]
-    df_excel = df_raw.iloc[header_idx + 1 :].copy()
-    df_excel.columns = header_values
-    df_excel = df_excel.dropna(how="all")  # 전체 빈 행 제거
+    for col in ("Date of birth", "Date of Therapy"):
+        values = df_excel[col].dropna()
+        if len(values) and all(isinstance(v, (dt.date, pd.Timestamp)) for v in values):
+            df_excel[col] = pd.to_datetime(df_excel[col])
     return df_excel
 
 
-def extract_data(df: pd.DataFrame, pdf_path: str) -> dict[Any, Any] | None:
-    row_data = {}
+class ExcelSheetReader:
+    """
+    의미 없는 상단 행이 있어도 실제 헤더가 있는 행을 찾는다. (요구 헤더: REQUIRED_EXCEL_COLS)
+    만들 때 헤더 행까지만 읽어 시트/열 범위/헤더 오류는 바로 InputError로 알리고,
+    read()가 나머지 행을 읽어 DataFrame을 만든다. (통합문서는 한 번만 열며 다른 스레드에서 불러도 됨)
+    같은 통합문서 내용/시트/열 범위는 메모리 캐시에서 복사본을 돌려준다.
+    다 읽기 전에 그만둘 때는 close()로 통합문서를 닫는다. (읽는 중이면 다음 행에서 멈추고 닫힘)
+    """
+
+    def __init__(self, input_path: Path, sheet_name: str, usecols: str) -> None:
+        self._key = (file_digest(input_path), sheet_name, usecols)
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._rows: Iterator[tuple] | None = None
+        with _excel_cache_lock:
+            self._cached = _excel_cache.get(self._key)
+            if self._cached is not None:
+                _excel_cache.move_to_end(self._key)
+                return
+
+        rows = _iter_sheet_rows(input_path, sheet_name, usecols)
+        try:
+            self._header_idx, self._header_values = _find_header_row(rows)
+        except Exception:
+            rows.close()
+            raise
+        self._rows = rows
+
+    def read(self) -> pd.DataFrame:
+        if self._cached is not None:
+            return self._cached.copy()
+        with self._lock:
+            rows, self._rows = self._rows, None
+        if rows is None:
+            raise RuntimeError("엑셀 읽기가 취소되었습니다.")
+        try:
+            df_excel = _sheet_frame(rows, self._header_idx, self._header_values, self._cancel)
+        finally:
+            rows.close()
+        with _excel_cache_lock:
+            _excel_cache[self._key] = df_excel
+            while len(_excel_cache) > EXCEL_CACHE_SIZE:
+                _excel_cache.popitem(last=False)
+        return df_excel.copy()
 
-    labels = df.iloc[:, 0]
-    values = df.iloc[:, 1]
-    labels = labels.astype(str).str.strip().str.replace('\n', '', regex=False)
-    values = values.astype(str).str.strip().str.replace('\n', '', regex=False)
+    def close(self) -> None:
+        self._cancel.set()
+        # read()가 이미 가져간 행은 읽는 스레드가 닫는다. (실행 중인 generator는 다른 스레드에서 닫을 수 없음)
+        with self._lock:
+            rows, self._rows = self._rows, None
+        if rows is not None:
+            rows.close()
 
-    for field in target_fields:
-        mask = labels.str.contains(field["pattern"], case=False, na=False, regex=True)
-        if mask.any():
-            extracted_value = values[mask].iloc[0]
+
+def _read_excel_with_header_detection(
+    input_path: Path, sheet_name: str, usecols: str
+) -> pd.DataFrame:
+    reader = ExcelSheetReader(input_path, sheet_name, usecols)
+    try:
+        return reader.read()
+    finally:
+        reader.close()
+
+
+def extract_cells(labels: List[Any], values: List[Any], pdf_path: str) -> dict[Any, Any] | None:
+    """
+    라벨/값 셀 목록에서 target_fields 값을 뽑는다. (pandas 없이 표 셀을 그대로 처리)
+    각 라벨은 FIELD_ANY 한 번으로 분류하고, 필드마다 처음 나온 행의 값을 쓴다.
+    """
+    found: Dict[int, str] = {}
+    for label, value in zip(labels, values):
+        for m in FIELD_ANY.finditer(str(label).strip().replace("\n", "")):
+            k = int(m.lastgroup[1:])
+            if k not in found:
+                found[k] = str(value).strip().replace("\n", "")
+        if len(found) == len(target_fields):
+            break
+
+    row_data = {}
+    for k, field in enumerate(target_fields):
+        if k in found:
+            extracted_value = found[k]
             if field["name"] == "DOB":
                 row_data[field["name"]] = convert_dob(extracted_value)
             elif field["name"] == "DOS":
@@ -126,109 +344,1382 @@ def extract_data(df: pd.DataFrame, pdf_path: str) -> dict[Any, Any] | None:
         return None
 
 
-def parse_pdf(pdf_path: str) -> List[Dict[str, Any]]:
-    doc = fitz.open(pdf_path)
+def extract_data(df: pd.DataFrame, pdf_path: str) -> dict[Any, Any] | None:
+    """첫 열을 라벨, 둘째 열을 값으로 보고 extract_cells를 적용한다."""
+    return extract_cells(df.iloc[:, 0].tolist(), df.iloc[:, 1].tolist(), pdf_path)
+
+
+def _header_spans(names: List[Any]) -> Tuple[Tuple[int, ...], List[Tuple[int, int]]]:
+    """배너 열 위치와, 배너 열 기준으로 나눈 차트별 (라벨 열, 값 열) 범위"""
+    col_indices = tuple(k for k, name in enumerate(names) if name and HEADER.search(name))
+    if len(col_indices) >= 2:
+        return col_indices, list(zip(col_indices, col_indices[1:] + (len(names),)))
+    return col_indices, [(0, len(names))]
+
+
+def _table_records(
+    names: List[Any], rows: List[List[Any]], pdf_path: str, timings: StageTimings | None = None
+) -> List[Dict[str, Any]]:
+    data_list = []
+    for start, end in _header_spans(names)[1]:
+        if end - start < 2:
+            continue
+        with stage(timings, "extract_cells"):
+            d = extract_cells([r[start] for r in rows], [r[start + 1] for r in rows], pdf_path)
+        if d:
+            data_list.append(d)
+    return data_list
+
+
+def _label_signature(names: List[Any], rows: List[List[Any]]) -> Tuple:
+    """차트별 라벨 열의 행마다 FIELD_ANY로 분류한 필드 순서 (행이 밀렸는지 확인용)"""
+    return tuple(
+        tuple(
+            tuple(m.lastgroup for m in FIELD_ANY.finditer(str(r[start]).strip().replace("\n", "")))
+            for r in rows
+        )
+        for start, end in _header_spans(names)[1]
+        if end - start >= 2
+    )
+
+
+class _TableTemplate(NamedTuple):
+    bbox: Tuple[float, float, float, float]
+    cells: Tuple[Tuple[tuple | None, ...], ...]  # 행별 셀 좌표 (첫 행은 표 안 헤더, 병합된 칸은 None)
+    margin: float  # 표 바로 바깥으로 보는 거리 (가장 높은 행 높이)
+    col_indices: Tuple[int, ...]
+    signature: Tuple
+
+
+class _PageTemplate(NamedTuple):
+    tables: Tuple[_TableTemplate, ...]
+    confirmed: bool  # 다른 페이지에서 find_tables 결과와 같게 나온 적이 있는지
+    uses: int = 0  # 확인 뒤 이 템플릿을 쓴 페이지 수 (TEMPLATE_RECHECK 주기 계산용)
+
+
+# (페이지 크기, 배너 위치) -> 표 템플릿. 프로세스마다 따로 배운다.
+_templates: "OrderedDict[tuple, _PageTemplate]" = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def _template_key(page: "fitz.Page", words: List[tuple]) -> tuple | None:
+    anchors = _find_header_anchors(_group_lines(words))
+    if not anchors:
+        return None
+    rect = page.rect
+    return (round(rect.width), round(rect.height)) + tuple(
+        tuple(round(v) for v in a) for a in sorted(anchors, key=lambda a: (a.y0, a.x0))
+    )
+
+
+def _learn_template(detected: List[Tuple[Any, List[Any], List[List[Any]]]]) -> _PageTemplate | None:
+    """find_tables 결과(표, 헤더 이름, 데이터 행)에서 템플릿을 만든다. 헤더가 모두 표 안에 있을 때만."""
+    tables = []
+    for table, names, rows in detected:
+        if table.header.external or len(table.rows) < 2:
+            return None
+        cells = tuple(tuple(tuple(c) if c is not None else None for c in row.cells) for row in table.rows)
+        tables.append(_TableTemplate(
+            bbox=tuple(table.bbox),
+            cells=cells,
+            margin=max(row.bbox[3] - row.bbox[1] for row in table.rows),
+            col_indices=_header_spans(names)[0],
+            signature=_label_signature(names, rows),
+        ))
+    return _PageTemplate(tuple(tables), False) if tables else None
+
+
+def _apply_template(
+    template: _PageTemplate, words: List[tuple]
+) -> List[Tuple[List[Any], List[List[Any]]]] | None:
+    """
+    템플릿 셀 좌표에 단어를 나눠 담아 표마다 (헤더 이름, 데이터 행)을 만든다. (find_tables + extract 대신)
+    표 안이나 표 바로 바깥(가장 높은 행 높이 이내: 표 밖 헤더가 생김)에 셀 하나에 들어가지 않는 단어가 있거나,
+    어느 표에도 속하지 않는 단어가 표 아래 같은 열 범위에 있거나(표가 늘어났을 수 있음),
+    배너 열/라벨 순서가 템플릿과 다르면 None.
+    """
+    tol = TEMPLATE_TOLERANCE
+    grids = [[[[] if c is not None else None for c in row] for row in t.cells] for t in template.tables]
+    for w in words:
+        cx, cy = (w[0] + w[2]) / 2, (w[1] + w[3]) / 2
+        for t, grid in zip(template.tables, grids):
+            x0, y0, x1, y1 = t.bbox
+            if not (x0 - t.margin <= cx <= x1 + t.margin and y0 - t.margin <= cy <= y1 + t.margin):
+                continue
+            for row, cell_words in zip(t.cells, grid):
+                k = next(
+                    (k for k, c in enumerate(row) if c is not None and c[0] <= cx < c[2] and c[1] <= cy < c[3]),
+                    None,
+                )
+                if k is not None:
+                    c = row[k]
+                    if w[0] < c[0] - tol or w[2] > c[2] + tol or w[1] < c[1] - tol or w[3] > c[3] + tol:
+                        return None
+                    cell_words[k].append(w)
+                    break
+            else:
+                return None
+            break
+        else:
+            if any(t.bbox[0] - t.margin <= cx <= t.bbox[2] + t.margin and cy > t.bbox[3] for t in template.tables):
+                return None
+
+    result = []
+    for t, grid in zip(template.tables, grids):
+        texts = [[_cell_text(ws) if ws is not None else None for ws in row] for row in grid]
+        names, rows = texts[0], texts[1:]
+        if _header_spans(names)[0] != t.col_indices or _label_signature(names, rows) != t.signature:
+            return None
+        result.append((names, rows))
+    return result
+
+
+def _extract_page_tables(
+    page: "fitz.Page",
+    pdf_path: str,
+    timings: StageTimings | None = None,
+    textpage: "fitz.TextPage | None" = None,
+    page_stats: Dict[str, Any] | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    페이지의 표에서 차트 값을 추출한다.
+    TABLE_TEMPLATES면 먼저 같은 배너 위치에서 배운(그리고 확인된) 템플릿으로 셀을 바로 채우고,
+    템플릿이 없거나 검증에 실패하면 find_tables로 감지한다. page_stats에 template_hits/misses를 센다.
+    새로 배운 템플릿은 다음 페이지에서, 확인된 템플릿도 TEMPLATE_RECHECK 페이지마다 find_tables 결과와 비교해
+    다르면 버리고 그 페이지에서 다시 배운다. 확인된 템플릿이 검증에 실패해도 버리고 다시 배운다.
+    """
+    key = words = template = None
+    if TABLE_TEMPLATES:
+        with stage(timings, "template"):
+            words = page.get_text("words", textpage=textpage)
+            key = _template_key(page, words)
+            if key is not None:
+                with _templates_lock:
+                    template = _templates.get(key)
+                    if template is not None:
+                        _templates.move_to_end(key)
+            recheck = template is not None and template.confirmed and (template.uses + 1) % TEMPLATE_RECHECK == 0
+            if template is not None and template.confirmed and not recheck:
+                direct = _apply_template(template, words)
+                if direct is not None:
+                    if page_stats is not None:
+                        page_stats["template_hits"] = page_stats.get("template_hits", 0) + 1
+                    _save_template(key, template._replace(uses=template.uses + 1))
+                    data_list = []
+                    for names, rows in direct:
+                        data_list.extend(_table_records(names, rows, pdf_path, timings))
+                    return data_list
+                template = None  # 맞지 않는 템플릿은 버리고 이 페이지에서 다시 배운다.
+        if page_stats is not None:
+            page_stats["template_misses"] = page_stats.get("template_misses", 0) + 1
+
+    detected = []
     data_list = []
-    for i in range(doc.page_count):
-        page = doc[i]
+    with stage(timings, "find_tables"):
         tables = page.find_tables()
-        for table in tables:
-            df = table.to_pandas()
-            col_indices = []
-            for k, col in enumerate(df.columns):
-                if HEADER.search(col):
-                    col_indices.append(k)
-
-            if len(col_indices) >= 2:
-                for c in range(len(col_indices) - 1):
-                    split_df = df.iloc[:, col_indices[c]:col_indices[c + 1]]
-                    d = extract_data(split_df, pdf_path)
-                    if d:
-                        data_list.append(d)
-                split_df = df.iloc[:, col_indices[-1]:]
-                d = extract_data(split_df, pdf_path)
-                if d:
-                    data_list.append(d)
+    for table in tables:
+        # to_pandas()와 같은 기준: 헤더가 표 안에 있으면 첫 행은 데이터가 아니다.
+        with stage(timings, "table_extract"):
+            names = table.header.names
+            rows = table.extract()
+        if not table.header.external:
+            rows = rows[1:]
+        detected.append((table, names, rows))
+        data_list.extend(_table_records(names, rows, pdf_path, timings))
+
+    if key is not None:
+        # 템플릿은 find_tables 결과와 같게 나와야 (다시) 쓰기 시작한다.
+        with stage(timings, "template"):
+            if template is not None and _apply_template(template, words) == [(n, r) for _, n, r in detected]:
+                template = template._replace(confirmed=True, uses=template.uses + 1)
             else:
-                d = extract_data(df, pdf_path)
-                if d:
-                    data_list.append(d)
+                template = _learn_template(detected)
+            _save_template(key, template)
+    return data_list
+
+
+def _save_template(key: tuple, template: _PageTemplate | None) -> None:
+    with _templates_lock:
+        if template is None:
+            _templates.pop(key, None)
+            return
+        _templates[key] = template
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+
+
+def _group_lines(words: List[tuple]) -> List[List[tuple]]:
+    """get_text("words") 결과를 (block, line) 단위로 묶어 x 순으로 정렬."""
+    lines: Dict[Tuple[int, int], List[tuple]] = {}
+    for w in words:
+        lines.setdefault((w[5], w[6]), []).append(w)
+    return [sorted(ws, key=lambda w: w[0]) for _, ws in sorted(lines.items())]
+
+
+def _bbox(words: List[tuple]) -> "fitz.Rect":
+    import fitz
+
+    return fitz.Rect(
+        min(w[0] for w in words), min(w[1] for w in words),
+        max(w[2] for w in words), max(w[3] for w in words),
+    )
+
+
+def _find_header_anchors(lines: List[List[tuple]]) -> List["fitz.Rect"]:
+    """HEADER 배너 위치. 배너가 두 줄로 나뉜 경우 같은 블록의 다음 줄까지 합쳐 본다."""
+    anchors = []
+    skip_next = False
+    for k, ws in enumerate(lines):
+        if skip_next:
+            skip_next = False
+            continue
+        text = " ".join(w[4] for w in ws)
+        if HEADER.search(text):
+            anchors.append(_bbox(ws))
+            continue
+        nxt = lines[k + 1] if k + 1 < len(lines) else None
+        if nxt and nxt[0][5] == ws[0][5] and HEADER.search(text + " " + " ".join(w[4] for w in nxt)):
+            anchors.append(_bbox(ws + nxt))
+            skip_next = True
+    return anchors
+
+
+def _label_end(ws: List[tuple]) -> float | None:
+    """줄의 앞부분이 target_fields 라벨이면 라벨 마지막 단어의 x1을 돌려준다."""
+    text = ""
+    for w in ws:
+        text = f"{text} {w[4]}" if text else w[4]
+        if LABEL_ANY.fullmatch(text.rstrip(".:")):
+            return w[2]
+    return None
+
+
+def _cell_text(words: List[tuple]) -> str:
+    """셀 안의 단어를 줄은 공백, 줄바꿈은 \n 으로 이어 find_tables 셀 텍스트와 맞춘다."""
+    return "\n".join(" ".join(w[4] for w in ws) for ws in _group_lines(words))
+
 
+def _extract_page_words(
+    page: "fitz.Page", pdf_path: str, textpage: "fitz.TextPage | None" = None
+) -> List[Dict[str, Any]] | None:
+    """
+    find_tables 없이 단어 좌표만으로 차트 값을 추출한다.
+    HEADER 배너로 차트 영역을 나누고, 라벨 열 오른쪽의 단어를 같은 행의 값으로 본다.
+    기준점(배너/라벨)을 찾지 못하면 None을 돌려주어 find_tables로 대체하게 한다.
+    """
+    import fitz
+
+    words = page.get_text("words", textpage=textpage)
+    if not words:
+        return None
+    anchors = _find_header_anchors(_group_lines(words))
+    if not anchors:
+        return None
+
+    # 배너가 가로로 나란히 있으면 배너 사이 중간점에서 영역을 나눈다.
+    anchors.sort(key=lambda r: (r.y0, r.x0))
+    rows_of_anchors: List[List[fitz.Rect]] = []
+    for a in anchors:
+        if rows_of_anchors and a.y0 < rows_of_anchors[-1][0].y1:
+            rows_of_anchors[-1].append(a)
+        else:
+            rows_of_anchors.append([a])
+
+    page_rect = page.rect
+    regions = []
+    for r, row in enumerate(rows_of_anchors):
+        row.sort(key=lambda a: a.x0)
+        y1 = rows_of_anchors[r + 1][0].y0 if r + 1 < len(rows_of_anchors) else page_rect.y1
+        for k, a in enumerate(row):
+            x0 = (row[k - 1].x1 + a.x0) / 2 if k > 0 else page_rect.x0
+            x1 = (a.x1 + row[k + 1].x0) / 2 if k + 1 < len(row) else page_rect.x1
+            regions.append(fitz.Rect(x0, a.y1, x1, y1))
+
+    data_list = []
+    for region in regions:
+        region_words = [
+            w for w in words
+            if region.x0 <= (w[0] + w[2]) / 2 < region.x1 and region.y0 <= (w[1] + w[3]) / 2 < region.y1
+        ]
+        ends = [e for e in (_label_end(ws) for ws in _group_lines(region_words)) if e is not None]
+        if not ends:
+            return None
+        label_right = max(ends)
+
+        label_words = [w for w in region_words if w[0] < label_right]
+        value_words = [w for w in region_words if w[0] >= label_right]
+        starts: List[float] = []
+        for y0 in sorted(min(w[1] for w in ws) for ws in _group_lines(label_words)):
+            if not starts or y0 - starts[-1] > 1:
+                starts.append(y0)
+        bounds = [y - 1 for y in starts] + [region.y1]
+
+        labels, values = [], []
+        for b in range(len(starts)):
+            def _in_band(w: tuple) -> bool:
+                return bounds[b] <= (w[1] + w[3]) / 2 < bounds[b + 1]
+            labels.append(_cell_text([w for w in label_words if _in_band(w)]))
+            values.append(_cell_text([w for w in value_words if _in_band(w)]))
+
+        d = extract_cells(labels, values, pdf_path)
+        if d is None:
+            return None
+        data_list.append(d)
     return data_list
 
 
-def run_matching(
-    pdf_dir: str | list[str] | None,
-    input_xlsx: str | None,
-    sheet_name: str,
-    columns: str,
-    progress_cb: Callable[[int, int, Path, int], None] | None = None,
+def _parse_pdf_pages(
+    pdf_path: str,
+    engine: str = "tables",
+    data: bytes | None = None,
+    profile: bool = False,
+    limits: ParseLimits | None = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    parse_pdf 본체. 추출 결과와 함께 {"parsed", "skipped"} 페이지 수를 돌려준다.
+    TABLE_TEMPLATES면 find_tables 경로를 탄 페이지 중 템플릿으로 처리한/못한 수("template_hits"/"template_misses")도 센다.
+    data가 주어지면 파일 대신 메모리의 PDF를 열고, pdf_path는 File 값으로만 쓴다.
+    profile=True면 stats에 "stages"(단계별 [초, 횟수])와 "seconds"(파일 전체)를 더한다.
+    limits가 주어지면 페이지 수/시간을 넘는 파일은 결과 없이 stats["skip_reason"]을 채우고,
+    MuPDF 리소스 캐시를 비운 뒤 stats에 이 프로세스의 "rss_mb", "peak_rss_mb"를 더한다.
+    """
+    if engine not in PARSE_ENGINES:
+        raise InputError(f"알 수 없는 추출 엔진입니다: {engine}")
+    import fitz
+
+    timings = StageTimings() if profile else None
+    deadline = time.perf_counter() + limits.timeout_sec if limits and limits.timeout_sec else None
+    data_list = []
+    page_stats: Dict[str, Any] = {"parsed": 0, "skipped": 0}
+    with stage(timings, "open"):
+        doc = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(pdf_path)
+    # 페이지/텍스트페이지/표는 페이지마다 참조가 끊기고, 문서는 끝나면 바로 닫는다.
+    with doc:
+        if limits and limits.max_pages and doc.page_count > limits.max_pages:
+            page_stats["skip_reason"] = f"페이지 수 초과 ({doc.page_count}p)"
+        for i in range(doc.page_count if "skip_reason" not in page_stats else 0):
+            if deadline is not None and time.perf_counter() > deadline:
+                page_stats["skip_reason"] = f"시간 초과 ({limits.timeout_sec:g}s, {i}/{doc.page_count}p)"
+                break
+            page = doc[i]
+            # 표 감지 전에 페이지 텍스트로 레코드가 나올 수 없는 페이지(서명, 이어지는 노트 등)를 거른다.
+            with stage(timings, "triage"):
+                textpage = page.get_textpage()
+                is_chart = PAGE_TRIAGE.search(page.get_text("text", textpage=textpage))
+            if not is_chart:
+                page_stats["skipped"] += 1
+                continue
+            page_stats["parsed"] += 1
+            if engine == "words":
+                with stage(timings, "words"):
+                    rows = _extract_page_words(page, pdf_path, textpage)
+                if rows is not None:
+                    data_list.extend(rows)
+                    continue
+            data_list.extend(_extract_page_tables(page, pdf_path, timings, textpage, page_stats))
+
+    if "skip_reason" in page_stats:
+        data_list = []
+    if limits is not None:
+        # 문서를 닫아도 MuPDF는 글꼴/이미지 캐시를 프로세스에 남겨 두므로 파일마다 비운다.
+        fitz.TOOLS.store_shrink(100)
+        page_stats["rss_mb"] = current_rss_mb()
+        page_stats["peak_rss_mb"] = peak_rss_mb(children=False)
+    if timings is not None:
+        timings.finish()
+        page_stats["stages"] = timings.stages
+        page_stats["seconds"] = timings.wall_sec
+    return data_list, page_stats
+
+
+def parse_pdf(pdf_path: str, engine: str = "tables") -> List[Dict[str, Any]]:
+    """
+    engine="tables": 페이지마다 find_tables로 표를 찾아 추출.
+    engine="words": 단어 좌표 기반 추출을 먼저 시도하고, 실패한 페이지만 find_tables 사용.
+    두 엔진 모두 Patient Name 라벨이 없는 페이지는 건너뛴다.
+    """
+    return _parse_pdf_pages(pdf_path, engine)[0]
+
+
+def format_page_stats(page_stats: Dict[str, int]) -> str:
+    """로그용 페이지 요약: 파싱/건너뜀 페이지 수와 표 템플릿 적중"""
+    text = f"페이지 - 파싱: {page_stats.get('parsed', 0)}, 건너뜀: {page_stats.get('skipped', 0)}"
+    hits = page_stats.get("template_hits", 0)
+    tried = hits + page_stats.get("template_misses", 0)
+    if tried:
+        text += f", 표 템플릿 적중: {hits}/{tried} ({hits / tried:.0%})"
+    return text
+
+
+def _add_page_stats(total: Dict[str, int] | None, stats: Dict[str, int]) -> None:
+    if total is not None:
+        for key in ("parsed", "skipped", "template_hits", "template_misses"):
+            total[key] = total.get(key, 0) + stats.get(key, 0)
+
+
+def _add_file_timings(timings: StageTimings | None, file: Path, stats: Dict[str, Any]) -> None:
+    if timings is not None and "stages" in stats:
+        timings.merge(stats["stages"])
+        timings.add_file(file, stats["seconds"], stats["parsed"] + stats["skipped"])
+
+
+def _iter_parse_results(
+    pdf_list: List[Path],
+    workers: int = 1,
     stop_flag: Callable[[], bool] | None = None,
-) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
-    if not pdf_dir:
-        raise ValueError("PDF 폴더 경로가 필요합니다.")
-    if not input_xlsx:
-        raise ValueError("입력 엑셀 경로가 필요합니다.")
+    cache: ParseCache | None = None,
+    engine: str = "tables",
+    page_stats: Dict[str, int] | None = None,
+    source: "ZipPdfSource | None" = None,
+    timings: StageTimings | None = None,
+    limits: ParseLimits | None = None,
+    resource_stats: Dict[str, Any] | None = None,
+    indices: Iterable[int] | None = None,
+    digests: Dict[int, str] | None = None,
+) -> Iterator[Tuple[int, Path, List[Dict[str, Any]]]]:
+    """
+    PDF 목록을 파싱하면서 (원래 인덱스, 파일, 추출 결과)를 완료 순서대로 돌려준다.
+    indices가 주어지면 pdf_list 중 그 인덱스만 처리한다. (중복 제거 후 남은 파일)
+    indices가 iterator면 pdf_list가 탐색 중에 늘어나는 것으로 보고, 나오는 대로 파싱한다. (스트리밍)
+    cache가 있으면 캐시 적중 파일은 파싱하지 않고, 새로 파싱한 결과는 캐시에 저장한다.
+    page_stats가 주어지면 새로 파싱한 파일의 처리/건너뛴 페이지 수와 표 템플릿 적중 수를 누적한다.
+    source가 주어지면 pdf_list[i]는 ZIP 내 가상 경로이고 내용은 source.read(i)로 읽는다.
+    digests: ZIP 멤버의 내용 해시(인덱스 -> SHA-256). 이미 계산한 해시(DuplicateFilter.digests)는 다시 계산하지 않고,
+             캐시 조회 때 계산한 해시는 채워 두었다가 캐시 저장에 쓴다.
+    workers > 1 이면 프로세스 풀을 사용하며, 중지 요청 시 대기 중인 작업은 취소된다.
+    timings가 주어지면 단계별 시간(작업 프로세스 포함)과 느린 파일을 누적한다.
+    limits가 주어지면 workers와 관계없이 작업 프로세스에서 파싱하고(ParseLimits 참고),
+    건너뛴 파일은 빈 결과로 돌려주며 resource_stats에 "skipped_files", "recycled", "worker_peak_rss_mb"를 채운다.
+    """
+    # 표 템플릿 추출 결과는 find_tables 결과와 따로 캐시한다.
+    cache_version = f"{PARSER_VERSION}-{engine}" + ("-tpl" if TABLE_TEMPLATES else "")
+    profile = timings is not None
+    if resource_stats is not None:
+        resource_stats.setdefault("skipped_files", [])
+        resource_stats.setdefault("recycled", 0)
+        resource_stats.setdefault("worker_peak_rss_mb", 0.0)
+
+    def _skip(i: int, reason: str) -> None:
+        if resource_stats is not None:
+            resource_stats["skipped_files"].append({"file": str(pdf_list[i]), "reason": reason})
+
+    known_digests = digests if digests is not None else {}
+
+    def _zip_digest(i: int, data: bytes | None = None) -> str:
+        digest = known_digests.get(i)
+        if digest is None:
+            digest = bytes_digest(data if data is not None else source.read(i))
+            known_digests[i] = digest
+        return digest
 
-    pdf_dirs: List[Path] = []
+    def _load(i: int) -> bytes | None:
+        return source.read(i) if source is not None else None
+
+    def _store(i: int, rows: List[Dict[str, Any]], data: bytes | None) -> None:
+        if cache is None:
+            return
+        with stage(timings, "cache_store"):
+            if data is None:
+                cache.put(pdf_list[i], cache_version, rows)
+            else:
+                cache.store(_zip_digest(i, data), cache_version, rows)
+
+    def _candidates() -> Iterator[Tuple[int, List[Dict[str, Any]] | None]]:
+        # (인덱스, 캐시 적중 결과 또는 None(파싱 필요))
+        for i in indices if indices is not None else range(len(pdf_list)):
+            if cache is None:
+                yield i, None
+                continue
+            if stop_flag and stop_flag():
+                raise RuntimeError("사용자 중지")
+            with stage(timings, "cache_lookup"):
+                if source is None:
+                    rows = cache.get(pdf_list[i], cache_version)
+                else:
+                    rows = cache.lookup(_zip_digest(i), cache_version)
+            if rows is not None:
+                # 캐시는 내용으로 찾으므로 처음 파싱한 경로가 들어 있다. (이동/이름 변경/사본/다른 ZIP)
+                rows = [dict(row, File=str(pdf_list[i])) for row in rows]
+            yield i, rows
+
+    streaming = isinstance(indices, Iterator)
+    candidates: Iterable[Tuple[int, List[Dict[str, Any]] | None]] = _candidates()
+    if not streaming:
+        # 목록이 정해져 있으면 캐시를 먼저 확인해 파싱할 파일이 1개 이하일 때 프로세스 풀을 띄우지 않는다.
+        candidates = list(candidates)
+    if limits is not None:
+        yield from _iter_parse_isolated(
+            pdf_list, iter(candidates), max(workers, 1), stop_flag, engine, page_stats, timings, limits,
+            resource_stats, _load, _store, _skip,
+        )
+        return
+
+    if workers <= 1 or (not streaming and sum(rows is None for _, rows in candidates) <= 1):
+        for i, rows in candidates:
+            if rows is not None:
+                yield i, pdf_list[i], rows
+                continue
+            if stop_flag and stop_flag():
+                raise RuntimeError("사용자 중지")
+            data = _load(i)
+            rows, stats = _parse_pdf_pages(str(pdf_list[i]), engine, data, profile)
+            _add_page_stats(page_stats, stats)
+            _add_file_timings(timings, pdf_list[i], stats)
+            _store(i, rows, data)
+            yield i, pdf_list[i], rows
+        return
+
+    # 소비 속도에 맞춰 제출: 동시에 대기하는 작업은 workers * 2개로 제한하고,
+    # ZIP 입력이면 대기 중인 PDF 바이트 합계도 source.buffer_size 이하로 유지 (최소 1개는 제출)
+    # 캐시 적중 결과도 workers * 2개까지만 모아 두고 돌려준다.
+    executor = ProcessPoolExecutor(max_workers=workers)
+    queue = iter(candidates)
+    exhausted = False
+    ready: deque = deque()  # 캐시 적중 (인덱스, 결과)
+    in_flight: Dict[Any, Tuple[int, bytes | None]] = {}
+    budget = source.buffer_size if source is not None else None
+
+    def _submit_next() -> bool:
+        nonlocal exhausted
+        if exhausted or len(in_flight) >= workers * 2 or len(ready) >= workers * 2:
+            return False
+        if budget is not None and in_flight and sum(len(d) for _, d in in_flight.values()) >= budget:
+            return False
+        item = next(queue, None)
+        if item is None:
+            exhausted = True
+            return False
+        i, rows = item
+        if rows is not None:
+            ready.append((i, rows))
+            return True
+        data = _load(i)
+        in_flight[executor.submit(_parse_pdf_pages, str(pdf_list[i]), engine, data, profile)] = (i, data)
+        return True
+
+    try:
+        while True:
+            while _submit_next():
+                pass
+            while ready:
+                i, rows = ready.popleft()
+                yield i, pdf_list[i], rows
+            if not in_flight:
+                if exhausted:
+                    break
+                continue
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if stop_flag and stop_flag():
+                    raise RuntimeError("사용자 중지")
+                i, data = in_flight.pop(future)
+                rows, stats = future.result()
+                _add_page_stats(page_stats, stats)
+                _add_file_timings(timings, pdf_list[i], stats)
+                _store(i, rows, data)
+                while _submit_next():
+                    pass
+                yield i, pdf_list[i], rows
+    finally:
+        # 중지/오류/소비 중단 시 아직 시작하지 않은 작업은 취소
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _kill_workers(executor: ProcessPoolExecutor) -> None:
+    """응답 없는 작업 프로세스를 강제 종료한다. (Python 3.14+는 공개 API, 이전 버전은 내부 목록 사용)"""
+    kill = getattr(executor, "kill_workers", None)
+    if kill is not None:
+        kill()
+        return
+    for proc in list((getattr(executor, "_processes", None) or {}).values()):
+        proc.kill()
+
+
+def _iter_parse_isolated(
+    pdf_list: List[Path],
+    candidates: Iterator[Tuple[int, List[Dict[str, Any]] | None]],
+    workers: int,
+    stop_flag: Callable[[], bool] | None,
+    engine: str,
+    page_stats: Dict[str, int] | None,
+    timings: StageTimings | None,
+    limits: ParseLimits,
+    resource_stats: Dict[str, Any] | None,
+    load: Callable[[int], bytes | None],
+    store: Callable[[int, List[Dict[str, Any]], bytes | None], None],
+    skip: Callable[[int, str], None],
+) -> Iterator[Tuple[int, Path, List[Dict[str, Any]]]]:
+    """
+    _iter_parse_results의 limits 모드. 작업 프로세스를 max_tasks_per_child마다(spawn, Python 3.11+) 새로 띄우고,
+    RSS가 max_rss_mb를 넘으면 풀을 교체한다. 페이지 사이 시간 확인으로 끝나지 않는 파일은
+    timeout_sec의 2배가 지나면 작업 프로세스를 종료하고 건너뛰며, 함께 실행 중이던 파일은 다시 제출한다.
+    작업 프로세스가 비정상 종료되면 실행 중이던 파일을 한 번 더 시도하고, 또 실패하면 건너뛴다.
+    candidates는 (인덱스, 캐시 적중 결과 또는 None)이며, 적중한 파일은 그대로 돌려준다.
+    """
+    profile = timings is not None
+    context = multiprocessing.get_context("spawn")
+    hard_timeout = limits.timeout_sec * 2 if limits.timeout_sec else None
+
+    def _new_executor() -> ProcessPoolExecutor:
+        # max_tasks_per_child는 Python 3.11부터 지원하므로 3.10에서는 교체 주기 없이 RSS 한도로만 교체한다.
+        if sys.version_info < (3, 11):
+            return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, max_tasks_per_child=limits.max_tasks_per_child
+        )
+
+    executor = _new_executor()
+    retiring: List[ProcessPoolExecutor] = []
+    retry: deque = deque()  # 다시 제출할 파일 (새 파일보다 먼저)
+    exhausted = False
+    in_flight: Dict[Any, Tuple[int, bytes | None, float, ProcessPoolExecutor]] = {}
+    ready: List[Tuple[int, List[Dict[str, Any]]]] = []  # 작업 프로세스 없이 끝난 파일 (캐시 적중, 건너뜀)
+    retried: set[int] = set()
+
+    def _replace_executor(retire: bool) -> None:
+        # retire면 기존 풀은 실행 중인 작업이 모두 끝난 뒤 닫고, 아니면(깨진 풀) 바로 닫는다.
+        # Python 3.11은 max_tasks_per_child 풀을 shutdown(wait=False)로 닫으면 관리 스레드가 오류를 내므로
+        # 항상 wait=True로 닫는다.
+        nonlocal executor
+        if retire:
+            retiring.append(executor)
+        else:
+            executor.shutdown(wait=True, cancel_futures=True)
+        executor = _new_executor()
+        if resource_stats is not None:
+            resource_stats["recycled"] += 1
+
+    def _submit_next() -> bool:
+        nonlocal exhausted
+        if len(in_flight) >= workers * 2 or len(ready) >= workers * 2:
+            return False
+        if retry:
+            i = retry.popleft()
+        else:
+            item = None if exhausted else next(candidates, None)
+            if item is None:
+                exhausted = True
+                return False
+            i, rows = item
+            if rows is not None:
+                ready.append((i, rows))
+                return True
+        data = load(i)
+        size = len(data) if data is not None else os.path.getsize(pdf_list[i])
+        if limits.max_file_mb and size > limits.max_file_mb * 2**20:
+            skip(i, f"파일 크기 초과 ({size / 2**20:.1f}MB)")
+            ready.append((i, []))
+            return True
+        future = executor.submit(_parse_pdf_pages, str(pdf_list[i]), engine, data, profile, limits)
+        in_flight[future] = (i, data, time.monotonic(), executor)
+        return True
+
+    try:
+        while True:
+            while _submit_next():
+                pass
+            while ready:
+                i, rows = ready.pop(0)
+                yield i, pdf_list[i], rows
+            if not in_flight:
+                if exhausted and not retry:
+                    break
+                continue
+            finished, _ = wait(in_flight, timeout=1.0 if hard_timeout else None, return_when=FIRST_COMPLETED)
+            if stop_flag and stop_flag():
+                raise RuntimeError("사용자 중지")
+            if not finished:
+                now = time.monotonic()
+                stuck = [f for f, (_, _, t0, _) in in_flight.items() if now - t0 > hard_timeout]
+                if stuck:
+                    # 작업 프로세스를 종료하면 풀 전체가 깨지므로, 멈춘 파일은 건너뛰고 나머지는 새 풀에 다시 제출
+                    for f in stuck:
+                        i = in_flight.pop(f)[0]
+                        skip(i, f"응답 없음 ({hard_timeout:g}s)")
+                        ready.append((i, []))
+                    retry.extendleft(entry[0] for entry in reversed(list(in_flight.values())))
+                    in_flight.clear()
+                    _kill_workers(executor)
+                    _replace_executor(retire=False)
+                continue
+            for future in finished:
+                i, data, _, owner = in_flight.pop(future)
+                try:
+                    rows, stats = future.result()
+                except BrokenProcessPool:
+                    # 같은 풀에서 실행 중이던 파일도 모두 여기로 온다. 한 번씩 다시 시도한다.
+                    if owner is executor:
+                        _replace_executor(retire=False)
+                    if i in retried:
+                        skip(i, "작업 프로세스 비정상 종료")
+                        ready.append((i, []))
+                    else:
+                        retried.add(i)
+                        retry.appendleft(i)
+                    continue
+                _add_page_stats(page_stats, stats)
+                _add_file_timings(timings, pdf_list[i], stats)
+                if resource_stats is not None:
+                    resource_stats["worker_peak_rss_mb"] = max(
+                        resource_stats["worker_peak_rss_mb"], stats["peak_rss_mb"]
+                    )
+                if "skip_reason" in stats:
+                    skip(i, stats["skip_reason"])
+                else:
+                    store(i, rows, data)
+                if limits.max_rss_mb and stats["rss_mb"] > limits.max_rss_mb and owner is executor:
+                    _replace_executor(retire=True)
+                yield i, pdf_list[i], rows
+            busy = {entry[3] for entry in in_flight.values()}
+            for old in [old for old in retiring if old not in busy]:
+                retiring.remove(old)
+                old.shutdown(wait=True)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for old in retiring:
+            old.shutdown(wait=True, cancel_futures=True)
+
+
+def _check_zip_member(name: str) -> None:
+    """압축을 풀 때와 같은 기준으로 루트 밖을 가리키는 멤버 경로를 거부한다."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if name.startswith(("/", "\\")) or ".." in parts or (parts and ":" in parts[0]):
+        raise ValueError("ZIP 내 경로가 대상 폴더 밖으로 벗어납니다.")
+
+
+class ZipPdfSource:
+    """
+    ZIP(중첩 ZIP 포함) 안의 PDF를 디스크에 풀지 않고 파서에 넘기는 입력 소스.
+    중첩 ZIP은 buffer_size까지 메모리에 두고 넘으면 임시 파일로 넘긴다(PDF는 풀지 않음).
+    병렬 파싱 시 동시에 메모리에 올리는 PDF 바이트 합계도 buffer_size로 제한된다.
+    """
+
+    def __init__(
+        self,
+        zip_file: str | Path | IO[bytes],
+        name: str = "upload.zip",
+        max_depth: int = 3,
+        buffer_size: int = DEFAULT_ZIP_BUFFER,
+    ):
+        self.max_depth = max_depth
+        self.buffer_size = buffer_size
+        self.names: List[str] = []
+        self._members: List[Tuple[zipfile.ZipFile, zipfile.ZipInfo]] = []
+        self._open: List[Any] = []
+        try:
+            self._walk(self._keep(zipfile.ZipFile(zip_file)), name, 0)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> "ZipPdfSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _keep(self, obj: Any) -> Any:
+        self._open.append(obj)
+        return obj
+
+    def _walk(self, zf: zipfile.ZipFile, prefix: str, depth: int) -> None:
+        if depth > self.max_depth:
+            raise ValueError("ZIP 중첩 깊이 한도를 초과했습니다.")
+        for info in zf.infolist():
+            _check_zip_member(info.filename)
+            if info.is_dir():
+                continue
+            lower = info.filename.lower()
+            if lower.endswith(".pdf"):
+                self.names.append(f"{prefix}/{info.filename}")
+                self._members.append((zf, info))
+            elif lower.endswith(".zip"):
+                spool = self._keep(tempfile.SpooledTemporaryFile(max_size=self.buffer_size))
+                with zf.open(info) as src:
+                    shutil.copyfileobj(src, spool, 1024 * 1024)
+                spool.seek(0)
+                self._walk(self._keep(zipfile.ZipFile(spool)), f"{prefix}/{info.filename}", depth + 1)
+
+    def read(self, index: int) -> bytes:
+        zf, info = self._members[index]
+        return zf.read(info)
+
+    def info(self, index: int) -> zipfile.ZipInfo:
+        """멤버 정보 (압축 해제 없이 크기/CRC 확인용)"""
+        return self._members[index][1]
+
+    def close(self) -> None:
+        for obj in reversed(self._open):
+            obj.close()
+        self._open = []
+
+
+class ParsedFile(NamedTuple):
+    index: int  # 파일 발견 순서
+    done: int
+    total: int
+    file: Path
+    records: List[Dict[str, Any]]
+    scanning: bool = False  # 아직 파일을 찾는 중 (total이 늘어날 수 있음)
+
+
+def _pdf_roots(pdf_dir: str | list[str]) -> List[Path]:
+    if not pdf_dir:
+        raise InputError("PDF 폴더 경로가 필요합니다.")
     if isinstance(pdf_dir, (list, tuple)):
         pdf_dirs = [_ensure_abs_path(p, "dir") for p in pdf_dir if p]
     else:
         pdf_dirs = [_ensure_abs_path(pdf_dir, "dir")]
     if not pdf_dirs:
-        raise ValueError("PDF 폴더 경로가 필요합니다.")
+        raise InputError("PDF 폴더 경로가 필요합니다.")
+    return pdf_dirs
 
-    input_path = _ensure_abs_path(input_xlsx, "file")
 
+def _discover_pdfs(
+    pdf_dir: str | list[str] | ZipPdfSource | None, scan: ScanOptions | None = None
+) -> List[Path]:
+    if isinstance(pdf_dir, ZipPdfSource):
+        return [Path(name) for name in pdf_dir.names]
+    return scan_files(_pdf_roots(pdf_dir), scan)
+
+
+class DuplicateFilter:
+    """
+    발견 순서대로 파일을 넣으며 내용이 같은 PDF를 거른다. (목록 전체를 기다리지 않고 탐색과 함께 동작)
+    같은 경로가 다시 나오면(겹치는 루트) 보고 없이 건너뛰고, 크기(ZIP은 크기+CRC)가 같은 파일이
+    나왔을 때만 SHA-256을 계산해 비교한다. 먼저 나온 파일이 남는다.
+    duplicates: {남긴 파일: [내용이 같은 다른 경로, ...]} (넘긴 dict를 그대로 채움)
+    count: 건너뛴 수 (같은 경로 반복 포함)
+    """
+
+    def __init__(
+        self,
+        pdf_list: List[Path],
+        source: ZipPdfSource | None = None,
+        duplicates: Dict[str, List[str]] | None = None,
+    ):
+        self.pdf_list = pdf_list
+        self.source = source
+        self.duplicates: Dict[str, List[str]] = duplicates if duplicates is not None else {}
+        self.count = 0
+        self.repeats = 0  # count 중 같은 경로 반복 수
+        self._by_path: set[str] = set()
+        self._by_size: Dict[tuple, List[int]] = {}  # 크기 -> 남긴 파일 인덱스
+        self.digests: Dict[int, str] = {}  # 계산한 내용 해시 (인덱스 -> SHA-256)
+
+    def _digest(self, i: int) -> str:
+        digest = self.digests.get(i)
+        if digest is None:
+            if self.source is not None:
+                digest = bytes_digest(self.source.read(i))
+            else:
+                digest = file_digest(self.pdf_list[i])
+            self.digests[i] = digest
+        return digest
+
+    def _mark(self, i: int, kept: int) -> None:
+        self.duplicates.setdefault(str(self.pdf_list[kept]), []).append(str(self.pdf_list[i]))
+        self.count += 1
+
+    def add(self, i: int) -> bool:
+        """pdf_list[i]를 파싱해야 하면 True, 앞서 나온 파일과 중복이면 False"""
+        file = self.pdf_list[i]
+        key = os.path.normcase(str(file))
+        if key in self._by_path:
+            self.count += 1
+            self.repeats += 1
+            return False
+        self._by_path.add(key)
+        if self.source is not None:
+            info = self.source.info(i)
+            size_key: tuple = (info.file_size, info.CRC)
+        else:
+            size_key = (file.stat().st_size,)
+        same_size = self._by_size.setdefault(size_key, [])
+        if same_size:
+            digest = self._digest(i)
+            for j in same_size:
+                if self._digest(j) == digest:
+                    self._mark(i, j)
+                    return False
+        same_size.append(i)
+        return True
+
+
+def find_duplicate_pdfs(
+    pdf_list: List[Path], source: ZipPdfSource | None = None
+) -> Tuple[List[int], Dict[str, List[str]]]:
+    """
+    내용이 같은 PDF를 찾아 발견 순서상 첫 파일만 남긴다. (DuplicateFilter 참고)
+    반환: (파싱할 인덱스 목록(발견 순서), {남긴 파일: [중복 경로, ...]})
+    """
+    dup = DuplicateFilter(pdf_list, source)
+    keep = [i for i in range(len(pdf_list)) if dup.add(i)]
+    return keep, dup.duplicates
+
+
+def iter_pdf_records(
+    pdf_dir: str | list[str] | ZipPdfSource | None,
+    workers: int = 1,
+    stop_flag: Callable[[], bool] | None = None,
+    cache: ParseCache | None = None,
+    engine: str = "tables",
+    page_stats: Dict[str, int] | None = None,
+    timings: StageTimings | None = None,
+    limits: ParseLimits | None = None,
+    resource_stats: Dict[str, Any] | None = None,
+    dedup: bool = True,
+    duplicate_files: Dict[str, List[str]] | None = None,
+    scan: ScanOptions | None = None,
+) -> Iterator[ParsedFile]:
+    """
+    PDF 루트(또는 ZipPdfSource)를 스캔하며 파일 하나가 끝날 때마다 ParsedFile(추출 레코드 포함)을 돌려준다.
+    폴더는 FileScanner(scan 설정: 포함/제외 패턴, 깊이, 동시 탐색 수)로 찾으며, 목록 전체를 기다리지 않고
+    찾는 대로 파싱한다. 그동안 total은 지금까지 찾은 고유 경로 수로 늘어나고 scanning이 True다.
+    limits/resource_stats는 _iter_parse_results 참고. (건너뛴 파일은 빈 records)
+    dedup이면 DuplicateFilter로 내용이 같은 PDF는 한 번만 파싱하고(total도 고유 파일 수),
+    duplicate_files가 주어지면 {남긴 파일: [중복 경로, ...]}를 채운다.
+    소비하는 만큼만 파싱을 진행하며(backpressure), stop_flag 또는 generator.close()로 중단한다.
+    병렬 파싱 시 완료 순서로 나오므로 순서가 필요하면 index로 정렬한다.
+    """
+    source = pdf_dir if isinstance(pdf_dir, ZipPdfSource) else None
+    scanner = None if source is not None else FileScanner(_pdf_roots(pdf_dir), scan, stop_flag)
     pdf_list: List[Path] = []
-    for root_dir in pdf_dirs:
-        pdf_list.extend(root_dir.rglob("*.pdf"))
-    total = len(pdf_list)
-    data: List[Dict[str, Any]] = []
-
-    for i, file in enumerate(pdf_list):
-        if stop_flag and stop_flag():
-            raise RuntimeError("사용자 중지")
-        rows = parse_pdf(str(file))
-        data.extend(rows)
-        if progress_cb:
-            progress_cb(i + 1, total, file, len(rows))
-
-    df_pdf = pd.DataFrame(data)
-
-    # Drop unused columns after matching
-    for col in ("Times", "Therapist"):
-        if col in df_pdf.columns:
-            df_pdf = df_pdf.drop(columns=col)
-
-    for col in ["Patient Name", "Diagnosis/CC", "Authorization No"]:
-        if col in df_pdf.columns:
-            df_pdf[col] = normalize_spaces(df_pdf[col])
-
-    df_excel = _read_excel_with_header_detection(input_path, sheet_name=sheet_name, usecols=columns)
+    dup = DuplicateFilter(pdf_list, source, duplicate_files) if dedup else None
+
+    def _admit(file: Path) -> int | None:
+        pdf_list.append(file)
+        i = len(pdf_list) - 1
+        if dup is not None:
+            with stage(timings, "dedup"):
+                if not dup.add(i):
+                    return None
+        return i
+
+    def _indices() -> Iterator[int]:
+        found = iter(scanner)
+        while not scanner.finished:
+            with stage(timings, "discover"):
+                file = next(found, None)
+            if file is None:
+                return
+            i = _admit(file)
+            if i is not None:
+                yield i
+        # 탐색이 끝나면 남은 파일의 중복을 한 번에 걸러 total을 확정한다.
+        rest = [i for i in map(_admit, found) if i is not None]
+        yield from rest
+
+    indices: Iterable[int]
+    if source is not None:
+        # ZIP 목록은 이미 있으므로 중복을 먼저 걸러 total을 정확히 한다.
+        pdf_list.extend(Path(name) for name in source.names)
+        with stage(timings, "dedup"):
+            indices = [i for i in range(len(pdf_list)) if dup is None or dup.add(i)]
+    else:
+        indices = _indices()
+    results = _iter_parse_results(
+        pdf_list,
+        workers=workers,
+        stop_flag=stop_flag,
+        cache=cache,
+        engine=engine,
+        page_stats=page_stats,
+        source=source,
+        timings=timings,
+        limits=limits,
+        resource_stats=resource_stats,
+        indices=indices,
+        digests=dup.digests if dup is not None and source is not None else None,
+    )
+    try:
+        for done, (i, file, rows) in enumerate(results, start=1):
+            if scanner is None:
+                scanning, found = False, len(pdf_list)
+            elif dup is None:
+                # 중복을 거르지 않으면 겹치는 루트에서 다시 찾은 경로도 파싱한다.
+                scanning, found = not scanner.finished, scanner.found + scanner.repeats
+            else:
+                # 같은 경로 반복은 scanner.found에 세지 않으므로 찾는 대로 늘어나기만 한다.
+                scanning, found = not scanner.finished, scanner.found + dup.repeats
+            # 아직 확인하지 않은 내용 중복은 빠지지 않았으므로 탐색이 끝난 뒤에도 마지막까지 조금 줄어들 수 있다.
+            total = max(found - (dup.count if dup is not None else 0), done)
+            yield ParsedFile(i, done, total, file, rows, scanning)
+    finally:
+        results.close()
+        if scanner is not None:
+            scanner.close()
+
+
+def _normalize_value(value: Any) -> str:
+    """normalize_spaces와 같은 규칙을 단일 값에 적용."""
+    if value is None:
+        return ""
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+@lru_cache(maxsize=65536)
+def _to_day(value: str) -> pd.Timestamp | None:
+    """레코드의 YYYY-MM-DD 문자열을 엑셀 날짜 키와 같은 Timestamp로. (변환 실패/빈 값은 None)"""
+    day = pd.to_datetime(value, format="%Y-%m-%d", errors="coerce")
+    return None if pd.isna(day) else day
+
+
+def record_key(rec: Dict[str, Any]) -> tuple | None:
+    """
+    추출 레코드의 매칭 키 (엑셀 EXCEL_MATCH_KEYS 값과 같은 형태).
+    DOB/DOS가 없으면 어떤 엑셀 행과도 매칭되지 않으므로 None.
+    """
+    if not rec.get("DOB") or not rec.get("DOS"):
+        return None
+    dob, dos = _to_day(rec["DOB"]), _to_day(rec["DOS"])
+    if dob is None or dos is None:
+        return None
+    return (
+        _normalize_value(rec.get("Patient Name")),
+        dob,
+        _normalize_value(rec.get("Diagnosis/CC")),
+        dos,
+    )
+
+
+class IncrementalMatcher:
+    """
+    레코드가 들어오는 대로 매칭 성공 건수를 갱신한다. (match_records와 같은 규칙)
+    엑셀 키별로 PDF 건수를 세어, 정확히 1건인 키에 해당하는 엑셀 행 수를 matched로 유지한다.
+    """
+
+    def __init__(self, df_excel: pd.DataFrame):
+        self._rows_per_key: Dict[tuple, int] = {}
+        for key in df_excel[EXCEL_MATCH_KEYS].dropna().itertuples(index=False, name=None):
+            self._rows_per_key[key] = self._rows_per_key.get(key, 0) + 1
+        self._pdf_counts: Dict[tuple, int] = {}
+        self.matched = 0
+
+    def add(self, records: List[Dict[str, Any]]) -> int:
+        for rec in records:
+            key = record_key(rec)
+            n_rows = self._rows_per_key.get(key) if key is not None else None
+            if not n_rows:
+                continue
+            count = self._pdf_counts.get(key, 0) + 1
+            self._pdf_counts[key] = count
+            if count == 1:
+                self.matched += n_rows
+            elif count == 2:
+                self.matched -= n_rows
+        return self.matched
+
+
+def _as_match_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """조인 전에 양쪽 키 타입을 맞춘다. (문자열은 object, 날짜는 datetime64)"""
+    for col in ("Date of birth", "Date of Therapy"):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def match_records(
+    df_pdf: pd.DataFrame, df_excel: pd.DataFrame
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    매칭 키로 PDF 추출 결과를 한 번에 조인해 엑셀 행에 Visit No/File을 채운다.
+    PDF에 같은 키가 정확히 1건 있을 때만 매칭으로 인정한다.
+    반환: (Visit No/File이 채워진 엑셀, {"unique", "ambiguous", "unmatched"} 건수)
+    """
+    df_excel = df_excel.copy()
+    df_excel["Visit No"] = ""
+    df_excel["File"] = ""
+    stats = {"unique": 0, "ambiguous": 0, "unmatched": len(df_excel)}
+    if df_excel.empty or not set(PDF_MATCH_KEYS + ["Visit No", "File"]).issubset(df_pdf.columns):
+        return df_excel, stats
+
+    # 키에 결측이 있는 행은 어떤 값과도 같지 않으므로 양쪽에서 제외
+    pdf = df_pdf[PDF_MATCH_KEYS + ["Visit No", "File"]].dropna(subset=PDF_MATCH_KEYS)
+    pdf = _as_match_keys(pdf.rename(columns=dict(zip(PDF_MATCH_KEYS, EXCEL_MATCH_KEYS))).astype(object))
+    sizes = pdf.groupby(EXCEL_MATCH_KEYS, sort=False).size().rename("_n").reset_index()
+    unique = pdf.drop_duplicates(subset=EXCEL_MATCH_KEYS, keep=False)
+
+    keys = _as_match_keys(df_excel[EXCEL_MATCH_KEYS].astype(object).reset_index(drop=True))
+    merged = (
+        keys.merge(sizes, how="left", on=EXCEL_MATCH_KEYS)
+        .merge(unique, how="left", on=EXCEL_MATCH_KEYS)
+    )
+    n = merged["_n"].fillna(0).to_numpy()
+    matched = n == 1
+
+    df_excel["Visit No"] = merged["Visit No"].where(matched, "").to_numpy()
+    df_excel["File"] = merged["File"].where(matched, "").to_numpy()
+    stats["unique"] = int(matched.sum())
+    stats["ambiguous"] = int((n > 1).sum())
+    stats["unmatched"] = int((n == 0).sum())
+    return df_excel, stats
+
+
+# 2차 유사 매칭: 점수 가중치와 채택 기준
+FUZZY_WEIGHTS = {"name": 0.5, "diagnosis": 0.3, "auth": 0.2}
+FUZZY_THRESHOLD = 0.85
+FUZZY_MIN_NAME = 0.8
+FUZZY_MARGIN = 0.05
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _fuzzy_text(value: Any, sort: bool = False) -> str:
+    """비교용 텍스트: 소문자, 영숫자 외 제거. sort=True면 단어 정렬 ("Doe, John" == "john doe")"""
+    words = _NON_ALNUM.sub(" ", _normalize_value(value).casefold()).split()
+    return " ".join(sorted(words) if sort else words)
+
+
+def _initials(text: str) -> str:
+    return "".join(w[0] for w in text.split() if w[0].isalpha())
+
+
+@lru_cache(maxsize=65536)
+def _similarity(a: str, b: str, floor: float = 0.0) -> float:
+    """
+    0~1 유사도. 같은 쌍(진단명 등)이 반복되므로 결과를 기억한다.
+    floor보다 낮을 것이 확실하면 SequenceMatcher.ratio 계산 없이 상한값만 돌려준다.
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    # 한쪽 단어가 다른 쪽에 모두 들어 있거나("low back pain" ⊂ "low back pain lumbar"),
+    # 머리글자 약어("lbp" == "low back pain")면 글자 비율보다 높게 본다.
+    ta, tb = set(a.split()), set(b.split())
+    bonus = 0.9 * len(ta & tb) / min(len(ta), len(tb))
+    if " " not in a and a == _initials(b) or " " not in b and b == _initials(a):
+        bonus = 0.9
+    matcher = SequenceMatcher(None, a, b)
+    upper = matcher.quick_ratio()
+    if max(upper, bonus) < floor:
+        return max(upper, bonus)
+    return max(matcher.ratio(), bonus)
+
+
+def _same_text_reason(a: Any, b: Any, sort: bool = False) -> str:
+    """비교용 텍스트가 같은 두 값의 사유. 원래 값이 다르면 어떤 차이인지 (순서/표기) 알려 준다."""
+    if _normalize_value(a) == _normalize_value(b):
+        return "일치"
+    if sort and _fuzzy_text(a) != _fuzzy_text(b):
+        return "순서 차이"
+    return "표기 차이"
+
+
+def _fuzzy_score(
+    row: Tuple[str, str, str], rec: Tuple[str, str, str], row_raw: Tuple[Any, Any, Any], rec_raw: Tuple[Any, Any, Any]
+) -> Tuple[float, str, float] | None:
+    """
+    (이름, 진단명, 승인번호) 비교 점수, 사유, 이름 점수. 승인번호가 한쪽이라도 없으면 가중치에서 뺀다.
+    row/rec는 비교용 텍스트, row_raw/rec_raw는 사유에 쓰는 원래 값이다.
+    (비교용 텍스트가 같아도 원래 값이 다르면 "이름 순서 차이"처럼 알려 준다)
+    이름 점수가 FUZZY_MIN_NAME 미만이면 후보가 아니므로 None.
+    """
+    name = _similarity(row[0], rec[0], FUZZY_MIN_NAME)
+    if name < FUZZY_MIN_NAME:
+        return None
+    diag = _similarity(row[1], rec[1])
+    parts = [("이름", name, FUZZY_WEIGHTS["name"], 0), ("진단", diag, FUZZY_WEIGHTS["diagnosis"], 1)]
+    if row[2] and rec[2]:
+        parts.append(
+            ("승인번호", 1.0 if row[2] == rec[2] else _similarity(row[2], rec[2]), FUZZY_WEIGHTS["auth"], 2)
+        )
+    score = sum(v * w for _, v, w, _ in parts) / sum(w for _, _, w, _ in parts)
+    reason = ", ".join(
+        f"{label} {_same_text_reason(row_raw[i], rec_raw[i], sort=i == 0) if v == 1.0 else f'{v:.2f}'}"
+        for label, v, _, i in parts
+    )
+    return score, reason, name
+
+
+def fuzzy_match_records(
+    df_pdf: pd.DataFrame, df_excel: pd.DataFrame, threshold: float = FUZZY_THRESHOLD
+) -> Tuple[pd.DataFrame, int]:
+    """
+    match_records 뒤에 실행하는 2차 매칭. 정확히 매칭되지 않은 엑셀 행을
+    생년월일/진료일이 같은 PDF 레코드(블록) 안에서만 이름/진단명/승인번호 유사도로 비교한다.
+    블록이 작으므로 전체 비교(행 x 레코드) 없이 거의 선형 시간에 끝난다.
+    점수가 threshold 이상이고 이름 점수가 FUZZY_MIN_NAME 이상이며 차순위보다 FUZZY_MARGIN 이상 높을 때만 채택하고,
+    PDF 레코드 하나는 한 행에만 쓴다. 이미 정확히 매칭된 키의 레코드는 후보에서 뺀다.
+    반환: (Match/Confidence/Match Reason 컬럼이 추가된 엑셀, 유사 매칭 건수)
+    """
+    df_excel = df_excel.copy()
+    exact = (df_excel["File"] != "").to_numpy()
+    match_kind = ["exact" if e else "" for e in exact]
+    confidence: List[Any] = [1.0 if e else None for e in exact]
+    reasons = [""] * len(exact)
+    if df_pdf.empty or not set(PDF_MATCH_KEYS + ["Visit No", "File"]).issubset(df_pdf.columns):
+        df_excel["Match"], df_excel["Confidence"], df_excel["Match Reason"] = match_kind, confidence, reasons
+        return df_excel, 0
+
+    excel_keys = _as_match_keys(df_excel[EXCEL_MATCH_KEYS].astype(object).reset_index(drop=True))
+    used_keys = set(excel_keys[exact].itertuples(index=False, name=None))
+
+    # (DOB, DOS) 블록 -> 후보 PDF 레코드 위치
+    pdf_keys = _as_match_keys(
+        df_pdf[PDF_MATCH_KEYS].rename(columns=dict(zip(PDF_MATCH_KEYS, EXCEL_MATCH_KEYS))).astype(object)
+    )
+    auth_col = df_pdf["Authorization No"] if "Authorization No" in df_pdf.columns else [None] * len(df_pdf)
+    blocks: Dict[tuple, List[int]] = {}
+    pdf_rows = list(zip(pdf_keys.itertuples(index=False, name=None), auth_col))
+    for pos, (key, _) in enumerate(pdf_rows):
+        if key in used_keys or pd.isna(key[1]) or pd.isna(key[3]):
+            continue
+        blocks.setdefault((key[1], key[3]), []).append(pos)
+
+    # 비교용 텍스트는 후보로 쓰일 때 한 번만 만든다.
+    pdf_text: Dict[int, Tuple[str, str, str]] = {}
+
+    def _text_of(pos: int) -> Tuple[str, str, str]:
+        text = pdf_text.get(pos)
+        if text is None:
+            key, auth = pdf_rows[pos]
+            text = pdf_text[pos] = (_fuzzy_text(key[0], sort=True), _fuzzy_text(key[2]), _normalize_value(auth).upper())
+        return text
+
+    # 블록 안의 (점수, 엑셀 행, PDF 레코드) 후보를 점수순으로 배정
+    auth_excel = df_excel["Authorization number"] if "Authorization number" in df_excel.columns else [None] * len(df_excel)
+    candidates = []
+    for r, (key, auth) in enumerate(zip(excel_keys.itertuples(index=False, name=None), auth_excel)):
+        if exact[r]:
+            continue
+        block = blocks.get((key[1], key[3]))
+        if not block:
+            continue
+        row_text = (_fuzzy_text(key[0], sort=True), _fuzzy_text(key[2]), _normalize_value(auth).upper())
+        scored = []
+        for p in block:
+            pdf_key, pdf_auth = pdf_rows[p]
+            result = _fuzzy_score(row_text, _text_of(p), (key[0], key[2], auth), (pdf_key[0], pdf_key[2], pdf_auth))
+            if result is not None:
+                scored.append((result[0], result[1], p))
+        if not scored:
+            continue
+        scored.sort(reverse=True)
+        best_score, reason, p = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score >= threshold and best_score - runner_up >= FUZZY_MARGIN:
+            candidates.append((best_score, r, p, reason))
+
+    visit_col = df_excel.columns.get_loc("Visit No")
+    file_col = df_excel.columns.get_loc("File")
+    used_pdf: set = set()
+    n_fuzzy = 0
+    for score, r, p, reason in sorted(candidates, reverse=True):
+        if p in used_pdf:
+            continue
+        used_pdf.add(p)
+        df_excel.iat[r, visit_col] = df_pdf["Visit No"].iat[p]
+        df_excel.iat[r, file_col] = df_pdf["File"].iat[p]
+        match_kind[r], confidence[r], reasons[r] = "fuzzy", round(score, 3), reason
+        n_fuzzy += 1
+
+    df_excel["Match"], df_excel["Confidence"], df_excel["Match Reason"] = match_kind, confidence, reasons
+    return df_excel, n_fuzzy
+
+
+def _normalize_excel(df_excel: pd.DataFrame) -> pd.DataFrame:
     df_excel["Weekly pt. tx list"] = normalize_spaces(df_excel["Weekly pt. tx list"])
     df_excel["Diagnosis"] = normalize_spaces(df_excel["Diagnosis"])
     df_excel["Authorization number"] = normalize_spaces(df_excel["Authorization number"])
-    df_excel["Date of birth"] = pd.to_datetime(df_excel["Date of birth"]).dt.strftime("%Y-%m-%d")
-    df_excel["Date of Therapy"] = pd.to_datetime(df_excel["Date of Therapy"]).dt.strftime("%Y-%m-%d")
-    df_excel["Visit No"] = ""
-    df_excel["File"] = ""
+    df_excel["Date of birth"] = pd.to_datetime(df_excel["Date of birth"]).dt.normalize()
+    df_excel["Date of Therapy"] = pd.to_datetime(df_excel["Date of Therapy"]).dt.normalize()
+    return df_excel
 
-    cnt = 0
-    for idx, row in df_excel.iterrows():
-        retrieves = df_pdf[
-            (df_pdf["Patient Name"] == row["Weekly pt. tx list"]) &
-            (df_pdf["DOB"] == row["Date of birth"]) &
-            (df_pdf["Diagnosis/CC"] == row["Diagnosis"]) &
-            # (df_pdf["Authorization No"] == row["Authorization number"]) &
-            (df_pdf["DOS"] == row["Date of Therapy"])
-        ]
-        if len(retrieves) == 1:
-            retrieve = retrieves.iloc[0]
-            df_excel.loc[idx, "Visit No"] = retrieve["Visit No"]
-            df_excel.loc[idx, "File"] = retrieve["File"]
-            cnt += 1
 
+def open_excel_sheet(input_path: Path, sheet_name: str, columns: str) -> ExcelSheetReader:
+    """
+    load_excel_sheet를 두 단계로 나눈 것. 시트/열 범위/헤더 행은 바로 확인하고(InputError),
+    돌려준 reader의 read()로 나머지 행을 읽는다. (정규화는 _normalize_excel로 따로)
+    """
+    return ExcelSheetReader(input_path, sheet_name=sheet_name, usecols=columns)
+
+
+def load_excel_sheet(input_path: Path, sheet_name: str, columns: str) -> pd.DataFrame:
+    """입력 엑셀을 읽어 매칭 키 컬럼을 정규화한다. (이름/진단명 공백, 날짜는 시각을 버린 datetime64)"""
+    return _normalize_excel(_read_excel_with_header_detection(input_path, sheet_name=sheet_name, usecols=columns))
+
+
+class RecordStore:
+    """
+    추출 레코드를 dict 대신 컬럼별 리스트로 모아 두는 저장소.
+    문자열은 intern해 같은 값(이름, 진단명, 파일 경로 등)이 메모리를 공유하고,
+    to_frame()에서 날짜는 datetime64, 반복 값 컬럼은 category로 만든다.
+    날짜 문자열(YYYY-MM-DD)로의 표기는 내보낼 때만 한다.
+    """
+
+    # 매칭/출력에 쓰지 않는 컬럼
+    UNUSED_COLS = ("Times", "Therapist")
+    # normalize_spaces와 같은 규칙으로 공백 정리 (None은 "")
+    NORMALIZED_COLS = ("Patient Name", "Diagnosis/CC", "Authorization No")
+    DATE_COLS = ("DOB", "DOS")
+    CATEGORY_COLS = ("Patient Name", "Diagnosis/CC", "Visit No", "Authorization No", "Validity Date (s)", "File")
+
+    def __init__(self, records: List[Dict[str, Any]] | None = None):
+        self._columns: Dict[str, List[Any]] = {}
+        # 컬럼별 원래 값 -> 저장 값(정규화 후 intern). 반복 값은 정규화를 다시 하지 않는다.
+        self._pools: Dict[str, Dict[Any, Any]] = {}
+        self._order: List[int] = []
+        self._sorted = True
+        if records:
+            self.add(records)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, records: List[Dict[str, Any]], order: int = 0) -> None:
+        """records를 추가한다. order(파일 발견 순서)가 작은 것부터 to_frame()에 나온다."""
+        if self._order and order < self._order[-1]:
+            self._sorted = False
+        columns, pools = self._columns, self._pools
+        for rec in records:
+            n = len(self._order)
+            filled = 0
+            for key, value in rec.items():
+                if key in self.UNUSED_COLS:
+                    continue
+                col = columns.get(key)
+                if col is None:
+                    col = columns[key] = [None] * n
+                    pools[key] = {}
+                pool = pools[key]
+                stored = pool.get(value, pool)
+                if stored is pool:
+                    stored = _normalize_value(value) if key in self.NORMALIZED_COLS else value
+                    if isinstance(stored, str):
+                        stored = sys.intern(stored)
+                    pool[value] = stored
+                col.append(stored)
+                filled += 1
+            self._order.append(order)
+            if filled < len(columns):
+                for col in columns.values():
+                    if len(col) == n:
+                        col.append(None)
+
+    def to_frame(self) -> pd.DataFrame:
+        data: Dict[str, Any] = {}
+        for key, values in self._columns.items():
+            if key in self.DATE_COLS:
+                # 같은 날짜는 한 번만 변환 (cache=True)
+                data[key] = pd.to_datetime(values, format="%Y-%m-%d", errors="coerce", cache=True)
+            elif key in self.CATEGORY_COLS:
+                data[key] = pd.Categorical(values)
+            else:
+                data[key] = values
+        df = pd.DataFrame(data)
+        if not self._sorted:
+            df = df.iloc[pd.Series(self._order).argsort(kind="stable").to_numpy()].reset_index(drop=True)
+        return df
+
+
+def build_pdf_frame(records: List[Dict[str, Any]] | RecordStore) -> pd.DataFrame:
+    """추출 레코드로 df_pdf를 만든다. (사용하지 않는 컬럼 제거, 텍스트 공백 정규화, 타입 지정)"""
+    store = records if isinstance(records, RecordStore) else RecordStore(records)
+    return store.to_frame()
+
+
+def format_excel_output(df_excel: pd.DataFrame) -> pd.DataFrame:
+    """매칭이 끝난 엑셀을 최종 출력 형식(컬럼 순서, 날짜 표기)으로 바꾼다."""
     # Drop unused columns and reorder for final output
     drop_cols = [c for c in ("Times", "Therapist") if c in df_excel.columns]
     if drop_cols:
@@ -253,35 +1744,277 @@ def run_matching(
         "Diagnosis",
         "Date of birth",
         "File",
+        "Match",
+        "Confidence",
+        "Match Reason",
     ]
     existing_cols = [c for c in desired_order if c in df_excel.columns]
     if existing_cols:
         df_excel = df_excel[existing_cols]
 
+    return df_excel
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def run_matching(
+    pdf_dir: str | list[str] | ZipPdfSource | None,
+    input_xlsx: str | None,
+    sheet_name: str,
+    columns: str,
+    progress_cb: Callable[[int, int, Path, int], None] | None = None,
+    stop_flag: Callable[[], bool] | None = None,
+    workers: int = 1,
+    cache: ParseCache | None = None,
+    engine: str = "tables",
+    page_stats: Dict[str, int] | None = None,
+    records_cb: Callable[[Path, List[Dict[str, Any]], int], None] | None = None,
+    match_stats: Dict[str, int] | None = None,
+    timings: StageTimings | None = None,
+    index: "VisitIndex | None" = None,
+    fuzzy: bool = False,
+    limits: ParseLimits | None = None,
+    resource_stats: Dict[str, Any] | None = None,
+    dedup: bool = True,
+    duplicate_files: Dict[str, List[str]] | None = None,
+    scan: ScanOptions | None = None,
+    timings_cb: Callable[[Dict[str, Any]], None] | None = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    """
+    scan: PDF 폴더 탐색 설정(포함/제외 패턴, 깊이 제한, 동시 탐색 수). 찾는 대로 파싱하므로
+          탐색이 끝나기 전에는 progress_cb의 total이 지금까지 찾은 파일 수로 늘어난다.
+    dedup: 내용이 같은 PDF(겹치는 루트, 복사본)는 한 번만 파싱한다. 중복 레코드가 매칭을 ambiguous로 만들지 않도록.
+    duplicate_files: 넘기면 건너뛴 중복 PDF를 {남긴 파일: [중복 경로, ...]}로 채운다.
+    limits: 메모리 제한 파싱. 작업 프로세스에서 파싱하고 교체하며, 크기/페이지/시간 초과 파일은 건너뛴다.
+    resource_stats: 넘기면 "peak_rss_mb"(이 프로세스와 종료된 작업 프로세스의 최대 RSS, 프로세스 시작 이후)를,
+                    limits가 있으면 "worker_peak_rss_mb", "recycled", "skipped_files"도 채운다.
+    fuzzy: 정확 매칭 후 fuzzy_match_records로 2차 유사 매칭을 한다.
+           결과에 Match/Confidence/Match Reason 컬럼이 붙고, 반환 건수에 유사 매칭 건수가 포함된다.
+    index: pdf_dir과 함께 주면 추출 결과를 방문 색인에 저장하고(루트 아래에서 사라진 파일은 색인에서 지움),
+           pdf_dir 없이 주면 PDF를 읽지 않고 색인에 있는 방문 기록으로 매칭한다.
+    progress_cb(done, total, file, rows): 파일 하나가 끝날 때마다 호출.
+    records_cb(file, records, matched): 추출 레코드와 현재까지의 매칭 성공 건수를 전달.
+    match_stats: 넘기면 match_records의 {"unique", "ambiguous", "unmatched"} 건수(fuzzy면 "fuzzy"도)를 채운다.
+    timings: 넘기면 단계별 시간을 누적한다. progress_cb 호출 시점에 그 파일까지 반영되어 있다.
+    timings_cb(snapshot): timings가 있으면 파일 하나가 끝날 때마다(progress_cb 다음) timings.to_dict()를 전달.
+    엑셀은 헤더 행까지 읽어 시트/열 범위/헤더를 먼저 확인(InputError)하고, 나머지는 파싱과 동시에 백그라운드에서 읽는다.
+    다 읽기 전까지 records_cb의 matched는 0이다.
+    """
+    if not pdf_dir and index is None:
+        raise InputError("PDF 폴더 경로가 필요합니다.")
+    if not input_xlsx:
+        raise InputError("입력 엑셀 경로가 필요합니다.")
+    input_path = _ensure_abs_path(input_xlsx, "file")
+
+    # 긴 PDF 파싱 전에 시트/열 범위/헤더 행부터 확인하고, 엑셀 전체 읽기는 파싱과 겹쳐 진행한다.
+    with stage(timings, "excel_header"):
+        excel = open_excel_sheet(input_path, sheet_name, columns)
+    excel_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tricare-excel")
+    excel_load = excel_pool.submit(_timed, lambda: _normalize_excel(excel.read()))
+    excel_pool.shutdown(wait=False)
+
+    def _excel_error() -> BaseException | None:
+        return excel_load.exception() if excel_load.done() else None
+
+    try:
+        # 병렬 파싱 시 완료 순서가 달라도 결과는 파일 발견 순서로 정렬 (RecordStore가 order로 정렬)
+        store = RecordStore()
+        resources = resource_stats if resource_stats is not None else {}
+        duplicates = duplicate_files if duplicate_files is not None else {}
+        if pdf_dir:
+            # 엑셀을 다 읽기 전에 나온 레코드는 모아 두었다가 IncrementalMatcher를 만들 때 넣는다.
+            matcher: IncrementalMatcher | None = None
+            waiting: List[Dict[str, Any]] = []
+            present: set[str] = set()
+            for event in iter_pdf_records(
+                pdf_dir, workers=workers, stop_flag=stop_flag, cache=cache, engine=engine, page_stats=page_stats,
+                timings=timings, limits=limits, resource_stats=resources, dedup=dedup, duplicate_files=duplicates,
+                scan=scan,
+            ):
+                store.add(event.records, order=event.index)
+                present.add(str(event.file))
+                # 건너뛴 파일은 색인에 넣지 않아야 다음 갱신 때 다시 시도한다.
+                skipped = not event.records and any(
+                    d["file"] == str(event.file) for d in resources.get("skipped_files", ())
+                )
+                if index is not None and not skipped:
+                    with stage(timings, "index_store"):
+                        index.add_file(event.file, event.records)
+                with stage(timings, "live_match"):
+                    if matcher is None and excel_load.done():
+                        # 엑셀 읽기 오류는 나머지 PDF 파싱을 기다리지 않고 바로 알린다.
+                        error = _excel_error()
+                        if error is not None:
+                            raise error
+                        matcher = IncrementalMatcher(excel_load.result()[0])
+                        matcher.add(waiting)
+                        waiting = []
+                    if matcher is not None:
+                        matcher.add(event.records)
+                    else:
+                        waiting.extend(event.records)
+                if progress_cb:
+                    progress_cb(event.done, event.total, event.file, len(event.records))
+                if records_cb:
+                    records_cb(event.file, event.records, matcher.matched if matcher is not None else 0)
+                if timings_cb and timings is not None:
+                    timings_cb(timings.to_dict())
+            if index is not None:
+                # 건너뛴 중복 사본이 예전에 색인됐으면 지운다. (VisitIndex.update와 같이, 남긴 파일과 함께 ambiguous가 되지 않도록)
+                with stage(timings, "index_store"):
+                    for paths in duplicates.values():
+                        for path in paths:
+                            index.remove_file(path)
+                    # 루트 아래에서 사라지거나 옮겨진 파일도 지운다. (VisitIndex.update와 같이, 끝까지 스캔한 경우만)
+                    if not isinstance(pdf_dir, ZipPdfSource) and not (stop_flag and stop_flag()):
+                        index.remove_missing(_pdf_roots(pdf_dir), present)
+
+        # 파싱이 엑셀 읽기보다 먼저 끝난 경우에만 기다린다.
+        with stage(timings, "excel_wait"):
+            df_excel, excel_sec = excel_load.result()
+    except BaseException:
+        # 중단/오류로 먼저 나가면 읽던 통합문서를 닫는다. 엑셀 읽기가 먼저 실패했으면 그 오류를 알린다.
+        excel.close()
+        error = _excel_error()
+        if error is not None:
+            raise error
+        raise
+    if timings is not None:
+        timings.add("excel_load", excel_sec)
+
+    with stage(timings, "match"):
+        if pdf_dir:
+            df_pdf = build_pdf_frame(store)
+        else:
+            # PDF 없이 색인에 있는 방문 기록으로 매칭
+            df_pdf = index.visits_for_sheet(df_excel)
+        df_excel, stats = match_records(df_pdf, df_excel)
+    cnt = stats["unique"]
+    if fuzzy:
+        with stage(timings, "fuzzy_match"):
+            df_excel, stats["fuzzy"] = fuzzy_match_records(df_pdf, df_excel)
+        cnt += stats["fuzzy"]
+    if match_stats is not None:
+        match_stats.update(stats)
+    with stage(timings, "format_output"):
+        df_excel = format_excel_output(df_excel)
+    resources["peak_rss_mb"] = round(peak_rss_mb(), 1)
     return df_pdf, df_excel, cnt
 
 
+def _write_xlsx(df: pd.DataFrame, target: str | Path | IO[bytes]) -> None:
+    import xlsxwriter
+
+    # constant_memory는 행 순서대로만 쓸 수 있어 pandas.to_excel(열 단위 기록) 대신 직접 기록
+    workbook = xlsxwriter.Workbook(
+        target if not isinstance(target, Path) else str(target),
+        {"constant_memory": True, "default_date_format": "yyyy-mm-dd"},
+    )
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, [str(c) for c in df.columns], workbook.add_format({"bold": True}))
+    columns = [df[c].tolist() for c in df.columns]
+    for r, row in enumerate(zip(*columns), start=1):
+        worksheet.write_row(r, 0, [None if pd.isna(v) else v for v in row])
+    workbook.close()
+
+
+def export_table(df: pd.DataFrame, target: str | Path | IO[bytes], fmt: str = "xlsx") -> None:
+    """결과 표를 xlsx/csv/parquet로 저장한다. target은 파일 경로 또는 바이너리 파일 객체."""
+    if fmt == "xlsx":
+        _write_xlsx(df, target)
+    elif fmt == "csv":
+        # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+        if isinstance(target, (str, Path)):
+            df.to_csv(target, index=False, encoding="utf-8-sig")
+        else:
+            text = io.TextIOWrapper(target, encoding="utf-8-sig", newline="")
+            df.to_csv(text, index=False)
+            text.detach()
+    elif fmt == "parquet":
+        df.to_parquet(target, index=False)
+    else:
+        raise InputError(f"지원하지 않는 출력 형식입니다: {fmt}")
+
+
+def _diff_records(a: List[Dict[str, Any]], b: List[Dict[str, Any]]) -> List[str]:
+    diffs = []
+    if len(a) != len(b):
+        diffs.append(f"추출 건수 다름: tables={len(a)}, words={len(b)}")
+    for k, (ra, rb) in enumerate(zip(a, b)):
+        for key in sorted(set(ra) | set(rb)):
+            if ra.get(key) != rb.get(key):
+                diffs.append(f"Row {k+1} {key}: tables={ra.get(key)!r}, words={rb.get(key)!r}")
+    return diffs
+
+
 def _cli() -> None:
     parser = argparse.ArgumentParser(
-        description="단일 PDF 파싱 테스트",
-        epilog="예시:\n  python processor.py C:\\\\path\\\\to\\\\chart.pdf",
+        description="PDF 파싱 테스트",
+        epilog="예시:\n  python processor.py C:\\\\path\\\\to\\\\chart.pdf\n"
+               "  python processor.py --workers 4 C:\\\\a.pdf C:\\\\b.pdf\n"
+               "  python processor.py --engine both C:\\\\a.pdf",
         formatter_class=argparse.RawTextHelpFormatter,
     )
-    parser.add_argument("pdf_path", help="테스트할 PDF 절대경로")
+    parser.add_argument("pdf_path", nargs="+", help="테스트할 PDF 절대경로 (여러 개 가능)")
+    parser.add_argument("--workers", type=int, default=1, help="병렬 파싱 프로세스 수 (기본 1)")
+    parser.add_argument("--cache", default=None, help="파싱 캐시 SQLite 경로 (미지정 시 캐시 미사용)")
+    parser.add_argument(
+        "--engine",
+        choices=[*PARSE_ENGINES, "both"],
+        default="tables",
+        help="추출 엔진 (both: 두 엔진을 모두 실행해 결과 비교)",
+    )
+    parser.add_argument("--timings", action="store_true", help="단계별 소요 시간과 느린 파일 출력")
+    parser.add_argument("--timings-json", default=None, help="단계별 소요 시간을 JSON으로 저장할 경로")
     args = parser.parse_args()
 
-    pdf_path = Path(args.pdf_path)
-    if not pdf_path.is_absolute():
-        raise SystemExit("pdf_path는 절대경로로 입력하세요.")
-    if not pdf_path.is_file():
-        raise SystemExit(f"PDF 파일을 찾을 수 없습니다: {pdf_path}")
-
-    rows = parse_pdf(str(pdf_path))
-    print(f"파일: {pdf_path}")
-    print(f"추출 건수: {len(rows)}")
-    for i, row in enumerate(rows):
-        print(f"\n--- Row {i+1} ---")
-        print(json.dumps(row, ensure_ascii=False, indent=2))
+    pdf_paths = [Path(p) for p in args.pdf_path]
+    for pdf_path in pdf_paths:
+        if not pdf_path.is_absolute():
+            raise SystemExit("pdf_path는 절대경로로 입력하세요.")
+        if not pdf_path.is_file():
+            raise SystemExit(f"PDF 파일을 찾을 수 없습니다: {pdf_path}")
+
+    if args.engine == "both":
+        n_diff = 0
+        for pdf_path in pdf_paths:
+            diffs = _diff_records(parse_pdf(str(pdf_path), "tables"), parse_pdf(str(pdf_path), "words"))
+            print(f"파일: {pdf_path} - {'일치' if not diffs else f'차이 {len(diffs)}건'}")
+            for line in diffs:
+                print(f"  {line}")
+            n_diff += bool(diffs)
+        print(f"\n엔진 결과가 다른 파일: {n_diff}/{len(pdf_paths)}")
+        return
+
+    cache = ParseCache(args.cache) if args.cache else None
+    page_stats: Dict[str, int] = {}
+    timings = StageTimings() if args.timings or args.timings_json else None
+    parsed: List[List[Dict[str, Any]]] = [[] for _ in pdf_paths]
+    for i, _, rows in _iter_parse_results(
+        pdf_paths, workers=args.workers, cache=cache, engine=args.engine, page_stats=page_stats, timings=timings
+    ):
+        parsed[i] = rows
+    print(format_page_stats(page_stats))
+    if timings is not None:
+        timings.finish()
+        if args.timings:
+            print("\n".join(timings.summary_lines()))
+        if args.timings_json:
+            Path(args.timings_json).write_text(timings.to_json(), encoding="utf-8")
+    if cache is not None:
+        print(f"파싱 캐시 - hit: {cache.hits}, miss: {cache.misses}")
+        cache.close()
+
+    for pdf_path, rows in zip(pdf_paths, parsed):
+        print(f"파일: {pdf_path}")
+        print(f"추출 건수: {len(rows)}")
+        for i, row in enumerate(rows):
+            print(f"\n--- Row {i+1} ---")
+            print(json.dumps(row, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+import contextlib
+import heapq
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Tuple
+
+DEFAULT_SLOWEST_FILES = 10
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+class StageTimings:
+    """
+    실행 단계별 누적 시간(초)과 호출 횟수, 가장 느린 파일 N개를 모은다. (켠 경우에만 측정)
+    병렬 파싱 시 작업 프로세스의 단계 시간이 합쳐지므로 단계 합계는 전체 경과 시간보다 클 수 있다.
+    """
+
+    def __init__(self, slowest_n: int = DEFAULT_SLOWEST_FILES):
+        self.slowest_n = slowest_n
+        self.stages: Dict[str, List[float]] = {}  # name -> [초, 횟수]
+        self._slowest: List[Tuple[float, str, int]] = []  # (초, 파일, 페이지 수) 최소 힙
+        self.started = time.perf_counter()
+        self.wall_sec: float | None = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [seconds, count]
+        else:
+            entry[0] += seconds
+            entry[1] += count
+
+    def merge(self, stages: Dict[str, List[float]]) -> None:
+        """다른 프로세스에서 모은 stages를 합친다."""
+        for name, (seconds, count) in stages.items():
+            self.add(name, seconds, int(count))
+
+    def add_file(self, file: str | Path, seconds: float, pages: int) -> None:
+        item = (seconds, str(file), pages)
+        if len(self._slowest) < self.slowest_n:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def finish(self) -> None:
+        self.wall_sec = time.perf_counter() - self.started
+
+    def slowest_files(self) -> List[Dict[str, Any]]:
+        return [
+            {"file": file, "seconds": round(seconds, 4), "pages": pages}
+            for seconds, file, pages in sorted(self._slowest, reverse=True)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = self.wall_sec if self.wall_sec is not None else time.perf_counter() - self.started
+        return {
+            "wall_sec": round(wall, 4),
+            "stages": {
+                name: {"seconds": round(seconds, 4), "count": int(count)}
+                for name, (seconds, count) in sorted(self.stages.items(), key=lambda kv: -kv[1][0])
+            },
+            "slowest_files": self.slowest_files(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def summary_lines(self) -> List[str]:
+        data = self.to_dict()
+        lines = [f"전체 경과: {data['wall_sec']:.3f}s"]
+        for name, s in data["stages"].items():
+            lines.append(f"  {name:<18} {s['seconds']:9.3f}s  x{s['count']}")
+        if data["slowest_files"]:
+            lines.append("가장 느린 파일:")
+            for f in data["slowest_files"]:
+                lines.append(f"  {f['seconds']:8.3f}s  {f['pages']}p  {f['file']}")
+        return lines
+
+
+def stage(timings: StageTimings | None, name: str) -> ContextManager[Any]:
+    """timings가 None이면 아무것도 하지 않는 컨텍스트. (측정을 끈 경우 비용 최소화)"""
+    return timings.stage(name) if timings is not None else _NO_STAGE
+
+
+# 메모리 (psutil 없이 표준 라이브러리만 사용)
+def _win_memory_counters() -> Any:
+    import ctypes
+    from ctypes import wintypes
+
+    class _Counters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t)
+            for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                         "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                         "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")
+        ]
+
+    counters = _Counters()
+    counters.cb = ctypes.sizeof(counters)
+    ctypes.windll.psapi.GetProcessMemoryInfo(
+        ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+    )
+    return counters
+
+
+def peak_rss_mb(children: bool = True) -> float:
+    """현재 프로세스(children=True면 종료된 자식 프로세스 포함) 중 최대 RSS (MB). 프로세스 시작 이후 값."""
+    try:
+        import resource
+    except ImportError:
+        return _win_memory_counters().PeakWorkingSetSize / 2**20
+    scale = 1 if sys.platform == "darwin" else 1024  # macOS는 바이트, Linux는 KB
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if children:
+        usage = max(usage, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage * scale / 2**20
+
+
+def current_rss_mb() -> float:
+    """현재 프로세스의 RSS (MB). Linux/Windows 외에는 최대 RSS로 대신한다."""
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    if sys.platform == "win32":
+        return _win_memory_counters().WorkingSetSize / 2**20
+    return peak_rss_mb(children=False)
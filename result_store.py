@@ -0,0 +1,223 @@
+"""
+실행 결과(df_pdf, df_excel)를 실행별 폴더에 Parquet로 내려 두는 저장소.
+
+앱 세션에는 ResultHandle(폴더 경로와 요약 수치)만 두고, 미리보기는 필터를 Parquet 스캔에 넘겨
+조건에 맞는 행 중 한 페이지만 읽는다. 다운로드 파일도 같은 폴더에 만들어 두고 다시 쓴다.
+마지막으로 읽은 지 ttl_sec가 지난 실행 폴더는 새 결과를 저장할 때 지운다.
+"""
+import datetime as dt
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_RESULTS_DIR = Path.home() / ".tricare" / "results"
+DEFAULT_TTL_SEC = 12 * 60 * 60
+ROW_GROUP_SIZE = 50_000
+
+TABLES = ("pdf", "excel")
+# 표별 필터 대상 컬럼
+FILTER_COLUMNS = {
+    "pdf": {"patient": "Patient Name", "date": "DOS", "file": "File"},
+    "excel": {"patient": "Weekly pt. tx list", "date": "Date of Therapy", "file": "File"},
+}
+# format_excel_output의 Date of Therapy 표기 (문자열 컬럼은 이 형식으로 비교)
+TEXT_DATE_FORMAT = "%Y.%m.%d"
+# 매칭 상태 필터 (excel 표만): 전체 | File이 채워진 행 | 빈 행 | Match가 fuzzy인 행
+MATCH_STATUSES = ("all", "matched", "unmatched", "fuzzy")
+
+_META = "meta.json"
+
+
+class ResultHandle(NamedTuple):
+    """세션에 두는 실행 결과 핸들. 표 데이터는 path 폴더의 Parquet에 있다."""
+    run_id: str
+    path: str
+    matched: int
+    pdf_files: int
+    pdf_rows: int
+    excel_rows: int
+
+
+class ResultFilter(NamedTuple):
+    patient: str = ""  # 환자 이름 부분 일치 (대소문자 무시)
+    date_from: dt.date | None = None  # 진료일 범위 (양끝 포함)
+    date_to: dt.date | None = None
+    status: str = "all"  # MATCH_STATUSES (excel 표만)
+    file: str = ""  # 파일 경로 부분 일치 (대소문자 무시)
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 엑셀 열에 숫자/문자가 섞인 경우: 섞인 object 열만 문자열로 저장
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(lambda v: None if v is None or v != v else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _text(col: str) -> ds.Expression:
+    # category로 저장된(dictionary) 열도 문자열로 비교
+    return pc.field(col).cast(pa.string())
+
+
+def _date_bound(day: dt.date, is_date: bool) -> Any:
+    return pa.scalar(day, pa.date32()) if is_date else day.strftime(TEXT_DATE_FORMAT)
+
+
+def _filter_expression(schema: pa.Schema, table: str, filters: ResultFilter) -> ds.Expression | None:
+    cols = FILTER_COLUMNS[table]
+    names = set(schema.names)
+    terms = []
+    for key, value in (("patient", filters.patient), ("file", filters.file)):
+        value = value.strip()
+        if value and cols[key] in names:
+            terms.append(pc.match_substring(_text(cols[key]), value, ignore_case=True))
+
+    date_col = cols["date"]
+    if (filters.date_from or filters.date_to) and date_col in names:
+        col_type = schema.field(date_col).type
+        is_date = pa.types.is_timestamp(col_type) or pa.types.is_date(col_type)
+        field = pc.field(date_col).cast(pa.date32(), safe=False) if is_date else _text(date_col)
+        if filters.date_from:
+            terms.append(field >= _date_bound(filters.date_from, is_date))
+        if filters.date_to:
+            terms.append(field <= _date_bound(filters.date_to, is_date))
+
+    if table == "excel" and filters.status != "all":
+        if filters.status not in MATCH_STATUSES:
+            raise ValueError(f"알 수 없는 매칭 상태입니다: {filters.status}")
+        has_file = pc.is_valid(pc.field("File")) & (_text("File") != "") if "File" in names else ds.scalar(False)
+        if filters.status == "matched":
+            terms.append(has_file)
+        elif filters.status == "unmatched":
+            terms.append(~has_file)
+        else:
+            terms.append(_text("Match") == "fuzzy" if "Match" in names else ds.scalar(False))
+
+    expr = None
+    for term in terms:
+        expr = term if expr is None else expr & term
+    return expr
+
+
+class ResultStore:
+    """
+    root/<run_id>/{pdf,excel}.parquet + meta.json 형태로 실행 결과를 저장하고 읽는다.
+    여러 세션/스레드에서 각자 만들어 써도 된다. (실행마다 폴더가 따로이고 쓰기는 임시 폴더에서 이름 변경)
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_RESULTS_DIR, ttl_sec: float = DEFAULT_TTL_SEC):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_sec = ttl_sec
+
+    def save(self, df_pdf: pd.DataFrame, df_excel: pd.DataFrame, matched: int) -> ResultHandle:
+        """결과를 새 실행 폴더에 저장하고 핸들을 돌려준다. 저장 전에 만료된 실행을 지운다."""
+        self.evict()
+        run_id = f"{dt.datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        path = self.root / run_id
+        tmp = self.root / f"{run_id}.tmp"
+        tmp.mkdir()
+        try:
+            for name, df in (("pdf", df_pdf), ("excel", df_excel)):
+                pq.write_table(_to_arrow(df), tmp / f"{name}.parquet", row_group_size=ROW_GROUP_SIZE)
+            handle = ResultHandle(
+                run_id=run_id,
+                path=str(path),
+                matched=int(matched),
+                pdf_files=int(df_pdf["File"].nunique()) if "File" in df_pdf.columns else len(df_pdf),
+                pdf_rows=len(df_pdf),
+                excel_rows=len(df_excel),
+            )
+            (tmp / _META).write_text(json.dumps(handle._asdict(), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return handle
+
+    def exists(self, handle: ResultHandle) -> bool:
+        """만료되어 지워지지 않았는지"""
+        return (Path(handle.path) / _META).exists()
+
+    def _file(self, handle: ResultHandle, name: str) -> Path:
+        run_dir = Path(handle.path)
+        meta = run_dir / _META
+        if not meta.exists():
+            raise FileNotFoundError("결과 보관 기간이 지나 삭제되었습니다. 다시 실행하세요.")
+        os.utime(meta)  # 마지막 사용 시각 (TTL 기준)
+        return run_dir / name
+
+    def _scanner(self, handle: ResultHandle, table: str, filters: ResultFilter | None) -> ds.Scanner:
+        if table not in TABLES:
+            raise ValueError(f"알 수 없는 결과 표입니다: {table}")
+        dataset = ds.dataset(self._file(handle, f"{table}.parquet"), format="parquet")
+        return dataset.scanner(filter=_filter_expression(dataset.schema, table, filters or ResultFilter()))
+
+    def count(self, handle: ResultHandle, table: str, filters: ResultFilter | None = None) -> int:
+        """필터에 맞는 행 수"""
+        return self._scanner(handle, table, filters).count_rows()
+
+    def page(
+        self,
+        handle: ResultHandle,
+        table: str,
+        filters: ResultFilter | None = None,
+        page: int = 0,
+        page_size: int = 100,
+    ) -> pd.DataFrame:
+        """필터에 맞는 행 중 page번째(0부터) 페이지만 읽는다. 페이지를 채우면 스캔을 멈춘다."""
+        scanner = self._scanner(handle, table, filters)
+        skip = max(page, 0) * page_size
+        need = page_size
+        batches = []
+        for batch in scanner.to_batches():
+            if need <= 0:
+                break
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            batch = batch.slice(skip, need)
+            skip = 0
+            need -= batch.num_rows
+            batches.append(batch)
+        return pa.Table.from_batches(batches, schema=scanner.projected_schema).to_pandas()
+
+    def table(self, handle: ResultHandle, table: str) -> pd.DataFrame:
+        """표 전체 (다운로드 파일 생성용)"""
+        if table not in TABLES:
+            raise ValueError(f"알 수 없는 결과 표입니다: {table}")
+        return pq.read_table(self._file(handle, f"{table}.parquet")).to_pandas()
+
+    def artifact_path(self, handle: ResultHandle, name: str) -> Path:
+        """실행 폴더 안의 다운로드 파일 경로 (실행과 함께 만료)"""
+        return self._file(handle, name)
+
+    def evict(self, now: float | None = None) -> int:
+        """마지막 사용 후 ttl_sec가 지난 실행 폴더(중단된 임시 폴더 포함)를 지우고 지운 수를 돌려준다."""
+        now = time.time() if now is None else now
+        removed = 0
+        for run_dir in self.root.iterdir():
+            if not run_dir.is_dir():
+                continue
+            meta = run_dir / _META
+            try:
+                last_used = (meta if meta.exists() else run_dir).stat().st_mtime
+            except OSError:
+                continue
+            if now - last_used > self.ttl_sec:
+                shutil.rmtree(run_dir, ignore_errors=True)
+                removed += 1
+        return removed
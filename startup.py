@@ -0,0 +1,113 @@
+"""
+앱 시작 시간 단축과 측정.
+
+app.py는 streamlit과 가벼운 모듈만 바로 import하고, pandas/PyMuPDF/엑셀 엔진과 이를 쓰는 모듈은
+첫 화면을 보낸 직후 백그라운드 스레드에서 미리 import한다. (처음 쓰는 시점에 아직 끝나지 않았으면 그때 import)
+launch.py가 시작 시각과 진입 경로를 환경 변수로 넘기면 실행부터 첫 화면까지의 시간을 보고한다.
+
+환경 변수:
+  TRICARE_PRELOAD          background(기본) | eager(첫 화면 직후 끝날 때까지 import) | off(처음 쓸 때만 import)
+  TRICARE_LAUNCH_T0        launch.py 시작 시각 (time.time())
+  TRICARE_LAUNCH_ENTRY     launch.py 진입 경로 (inprocess | subprocess)
+  TRICARE_STARTUP_REPORT   첫 화면 후 시작 보고서(JSON)를 저장할 경로
+"""
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+PRELOAD_ENV = "TRICARE_PRELOAD"
+LAUNCH_T0_ENV = "TRICARE_LAUNCH_T0"
+LAUNCH_ENTRY_ENV = "TRICARE_LAUNCH_ENTRY"
+REPORT_ENV = "TRICARE_STARTUP_REPORT"
+
+# 실행 버튼이 먼저 쓰는 앱 모듈(pandas 포함)부터, 파싱/엑셀 단계에서 쓰는 엔진은 뒤에.
+HEAVY_MODULES = ("processor", "visit_index", "watcher", "openpyxl", "fitz", "xlsxwriter", "result_store")
+
+_T0 = float(os.environ.get(LAUNCH_T0_ENV) or time.time())
+_marks: Dict[str, float] = {}  # 이름 -> 실행 후 경과 초 (처음 한 번만)
+_imports: Dict[str, float] = {}  # 모듈 -> preload에서 걸린 초 (이미 로드된 모듈은 0)
+_lock = threading.Lock()
+_preload_thread: threading.Thread | None = None
+_reported = False
+
+
+def mark_launch(entry: str) -> None:
+    """launch.py 시작 시 호출. 자식 프로세스(streamlit)에도 환경 변수로 전달된다."""
+    os.environ.setdefault(LAUNCH_T0_ENV, repr(_T0))
+    os.environ.setdefault(LAUNCH_ENTRY_ENV, entry)
+
+
+def mark(name: str) -> float:
+    """실행 후 경과 시간을 기록한다. 같은 이름은 처음 값만 남는다."""
+    with _lock:
+        return _marks.setdefault(name, time.time() - _T0)
+
+
+def _import_all(modules: Iterable[str]) -> None:
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        with _lock:
+            _imports.setdefault(name, time.perf_counter() - t0)
+    mark("preload_done")
+
+
+def preload(modules: Iterable[str] = HEAVY_MODULES) -> threading.Thread | None:
+    """
+    TRICARE_PRELOAD에 따라 무거운 모듈을 미리 import한다. 프로세스당 한 번만 동작한다.
+    background면 데몬 스레드를 시작해 돌려주고, eager면 끝날 때까지 기다린다.
+    """
+    global _preload_thread
+    mode = os.environ.get(PRELOAD_ENV, "background").lower()
+    modules = tuple(modules)
+    with _lock:
+        if _preload_thread is not None or mode == "off":
+            return _preload_thread
+        _preload_thread = threading.Thread(
+            target=_import_all, args=(modules,), name="tricare-preload", daemon=True
+        )
+    mark("preload_start")
+    _preload_thread.start()
+    if mode == "eager":
+        _preload_thread.join()
+    return _preload_thread
+
+
+def report() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "entry": os.environ.get(LAUNCH_ENTRY_ENV, "direct"),
+            "preload": os.environ.get(PRELOAD_ENV, "background").lower(),
+            "since_launch_sec": {k: round(v, 4) for k, v in sorted(_marks.items(), key=lambda kv: kv[1])},
+            "preload_import_sec": {k: round(v, 4) for k, v in _imports.items()},
+            "loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+        }
+
+
+def report_first_render() -> None:
+    """첫 화면을 다 그린 뒤 한 번만: 경과 시간을 stderr에 남기고, 지정된 경로가 있으면 JSON으로 저장한다."""
+    global _reported
+    mark("first_render")
+    with _lock:
+        if _reported:
+            return
+        _reported = True
+    data = report()
+    marks = data["since_launch_sec"]
+    print(
+        f"[startup] {data['entry']}/{data['preload']}: 첫 화면 {marks['first_render']:.2f}s "
+        f"(스크립트 시작 {marks.get('script_start', 0):.2f}s)",
+        file=sys.stderr,
+        flush=True,
+    )
+    path = os.environ.get(REPORT_ENV)
+    if path:
+        Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
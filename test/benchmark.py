@@ -0,0 +1,280 @@
+"""
+합성 데이터로 파싱/매칭 처리량을 측정하는 벤치마크.
+
+HEADER/target_fields 형식의 차트 PDF와 대응하는 입력 엑셀을 PyMuPDF/openpyxl로 만들고,
+크기별(기본 100, 1000, 10000 차트)로 별도 프로세스에서 다음을 측정한다.
+  - parse_pdf 처리량 (files/s)
+  - match_records 처리량 (rows/s, PDF 행 + 엑셀 행)
+  - run_matching 전체 소요 시간과 최대 RSS
+
+결과는 JSON으로 저장하고, 기준(baseline) JSON과 비교해 허용 범위를 넘으면 종료 코드 1.
+
+예시:
+  python test/benchmark.py --sizes 100 1000 --output bench.json
+  python test/benchmark.py --save-baseline test/bench_baseline.json
+  python test/benchmark.py --baseline test/bench_baseline.json --max-slowdown 0.2
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import fitz
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processor import build_pdf_frame, load_excel_sheet, match_records, parse_pdf, run_matching  # noqa: E402
+from profiling import peak_rss_mb  # noqa: E402
+
+DATASET_VERSION = "1"
+SHEET_NAME = "Jun 30 _ Jul 5"
+COLUMNS = "A:G"
+HEADER_TEXT = "Dr. Joung's Clinic & Physical Therapy Center"
+DEFAULT_SIZES = [100, 1000, 10000]
+PARSE_SAMPLE = 300
+MIN_MATCH_SEC = 0.5
+
+# 처리량(높을수록 좋음)과 시간/메모리(낮을수록 좋음) 지표
+HIGHER_IS_BETTER = ("parse_files_per_sec", "match_rows_per_sec")
+LOWER_IS_BETTER = ("e2e_sec", "peak_rss_mb")
+
+
+# 합성 데이터
+def chart_rows(i: int) -> List[tuple]:
+    dob = dt.date(1950, 1, 1) + dt.timedelta(days=i * 37 % 25000)
+    dos = dt.date(2025, 6, 30) + dt.timedelta(days=i % 6)
+    return [
+        ("Patient Name", f"Patient{i:05d}, Test"),
+        ("DOB", dob.strftime("%B %d, %Y").replace(" 0", " ")),
+        ("Diagnosis/CC", f"Low back pain {i % 7}"),
+        ("Therapist", "Kim"),
+        ("DOS", dos.strftime("%m/%d/%Y")),
+        ("Visit No.", f"#{i % 12 + 1}/12 (AT-{1000000 + i:010d})"),
+        ("Validity Date (s)", "06/01/2025 - 09/30/2025"),
+    ]
+
+
+def _cell(page: fitz.Page, rect: fitz.Rect, text: str) -> None:
+    page.draw_rect(rect, width=0.8)
+    page.insert_textbox(rect + (2, 2, -2, 0), text, fontsize=7)
+
+
+def _draw_charts(page: fitz.Page, x0: float, y0: float, ids: List[int]) -> None:
+    """ids 차트를 한 표에 나란히 그린다. (2개 이상이면 배너 열 기준으로 나뉘는 표)"""
+    w_label, w_value, h = 80, 150, 20
+    width = w_label + w_value
+    for j, i in enumerate(ids):
+        x = x0 + j * width
+        _cell(page, fitz.Rect(x, y0, x + width, y0 + h), HEADER_TEXT)
+        for r, (label, value) in enumerate(chart_rows(i), start=1):
+            y = y0 + r * h
+            _cell(page, fitz.Rect(x, y, x + w_label, y + h), label)
+            _cell(page, fitz.Rect(x + w_label, y, x + width, y + h), value)
+
+
+def make_chart_pdf(path: Path, layout: List[List[List[int]]]) -> None:
+    """layout: 페이지별 표 목록, 표마다 차트 id 목록. 마지막에 차트 없는 서명 페이지를 붙인다."""
+    doc = fitz.open()
+    for tables in layout:
+        page = doc.new_page(width=612, height=792)
+        for k, ids in enumerate(tables):
+            _draw_charts(page, 40, 40 + k * 200, ids)
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((50, 80), "Therapist signature: ____________")
+    doc.save(str(path))
+    doc.close()
+
+
+def make_dataset(root: Path, n_charts: int) -> Dict[str, Any]:
+    """
+    n_charts개 차트를 담은 PDF 폴더와 입력 엑셀을 만든다. 이미 있으면 재사용.
+    파일 모양: 차트 1개 / 한 페이지에 표 2개 / 한 표에 차트 2개를 번갈아 사용.
+    """
+    out = root / f"v{DATASET_VERSION}_{n_charts}"
+    meta_path = out / "dataset.json"
+    if meta_path.is_file():
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+
+    pdf_dir = out / "pdfs"
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    i = n_files = 0
+    while i < n_charts:
+        kind = n_files % 3
+        if kind == 0 or i + 1 >= n_charts:
+            layout, i_next = [[[i]]], i + 1
+        elif kind == 1:
+            layout, i_next = [[[i], [i + 1]]], i + 2
+        else:
+            layout, i_next = [[[i, i + 1]]], i + 2
+        make_chart_pdf(pdf_dir / f"chart_{n_files:05d}.pdf", layout)
+        i, n_files = i_next, n_files + 1
+
+    # 입력 엑셀: 제목/빈 행 뒤 헤더, 모든 차트 + 매칭되지 않는 행 5%
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    ws.append(["Weekly list"])
+    ws.append([])
+    ws.append(["Weekly pt. tx list", "Date of birth", "Diagnosis", "Authorization number",
+               "Date of Therapy", "Times", "Therapist"])
+    for k in range(n_charts):
+        r = dict(chart_rows(k))
+        ws.append([
+            "  " + r["Patient Name"].replace(", ", ",  "),
+            dt.datetime.strptime(r["DOB"], "%B %d, %Y"),
+            r["Diagnosis/CC"],
+            f"AT-{1000000 + k:010d}",
+            dt.datetime.strptime(r["DOS"], "%m/%d/%Y"),
+            1,
+            "Kim",
+        ])
+    n_extra = max(1, n_charts // 20)
+    for k in range(n_extra):
+        ws.append([f"Nobody{k}, X", dt.datetime(1990, 1, 1), "Neck pain", "AT-1", dt.datetime(2025, 7, 1), 1, "Kim"])
+    xlsx = out / "input.xlsx"
+    wb.save(str(xlsx))
+
+    meta = {
+        "charts": n_charts,
+        "files": n_files,
+        "excel_rows": n_charts + n_extra,
+        "pdf_dir": str(pdf_dir),
+        "excel": str(xlsx),
+    }
+    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+# 측정 (크기마다 새 프로세스에서 실행해 최대 RSS를 분리)
+def measure(meta: Dict[str, Any], workers: int, engine: str) -> Dict[str, Any]:
+    pdfs = sorted(Path(meta["pdf_dir"]).glob("*.pdf"))
+
+    sample = pdfs[:PARSE_SAMPLE]
+    t0 = time.perf_counter()
+    for p in sample:
+        parse_pdf(str(p), engine)
+    parse_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    df_pdf, df_excel, matched = run_matching(
+        meta["pdf_dir"], meta["excel"], SHEET_NAME, COLUMNS, workers=workers, engine=engine
+    )
+    e2e_sec = time.perf_counter() - t0
+    if matched != meta["charts"]:
+        raise RuntimeError(f"매칭 건수가 다릅니다: {matched} (기대값 {meta['charts']})")
+
+    # 매칭 단계만: 측정 시간이 너무 짧으면 반복
+    df_raw = load_excel_sheet(Path(meta["excel"]), SHEET_NAME, COLUMNS)
+    records = df_pdf.to_dict("records")
+    rounds = 0
+    t0 = time.perf_counter()
+    while True:
+        _, stats = match_records(build_pdf_frame(records), df_raw)
+        rounds += 1
+        match_sec = time.perf_counter() - t0
+        if match_sec >= MIN_MATCH_SEC:
+            break
+    if stats["unique"] != meta["charts"]:
+        raise RuntimeError(f"match_records 결과가 다릅니다: {stats}")
+
+    return {
+        "charts": meta["charts"],
+        "files": len(pdfs),
+        "parse_files_per_sec": round(len(sample) / parse_sec, 2),
+        "match_rows_per_sec": round(rounds * (len(df_pdf) + len(df_raw)) / match_sec, 1),
+        "e2e_sec": round(e2e_sec, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_slowdown: float, max_rss_growth: float) -> List[str]:
+    """baseline 대비 허용 범위를 넘은 지표 목록."""
+    failures = []
+    for size, cur in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            continue
+        for key in HIGHER_IS_BETTER:
+            if cur[key] < base[key] * (1 - max_slowdown):
+                failures.append(f"{size} {key}: {cur[key]} < 기준 {base[key]} (-{max_slowdown:.0%} 초과)")
+        limits = {"e2e_sec": max_slowdown, "peak_rss_mb": max_rss_growth}
+        for key in LOWER_IS_BETTER:
+            if cur[key] > base[key] * (1 + limits[key]):
+                failures.append(f"{size} {key}: {cur[key]} > 기준 {base[key]} (+{limits[key]:.0%} 초과)")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="합성 데이터 파싱/매칭 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="차트 수 (기본 100 1000 10000)")
+    parser.add_argument("--workers", type=int, default=1, help="run_matching 병렬 파싱 프로세스 수")
+    parser.add_argument("--engine", choices=["tables", "words"], default="tables", help="추출 엔진")
+    parser.add_argument("--data-dir", default=str(Path(tempfile.gettempdir()) / "tricare_bench"),
+                        help="합성 데이터 저장 폴더 (크기별로 재사용)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 JSON")
+    parser.add_argument("--save-baseline", default=None, help="이번 결과를 기준 JSON으로 저장")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="처리량/시간 허용 악화 비율 (기본 0.2)")
+    parser.add_argument("--max-rss-growth", type=float, default=0.25, help="최대 RSS 허용 증가 비율 (기본 0.25)")
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        meta = make_dataset(Path(args.data_dir), args.child)
+        print(json.dumps(measure(meta, args.workers, args.engine)))
+        return 0
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "date": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+            "cpus": os.cpu_count(),
+            "workers": args.workers,
+            "engine": args.engine,
+        },
+        "results": {},
+    }
+    for size in args.sizes:
+        t0 = time.perf_counter()
+        make_dataset(Path(args.data_dir), size)
+        print(f"[{size}] 데이터 준비 {time.perf_counter() - t0:.1f}s", file=sys.stderr, flush=True)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", str(size), "--workers", str(args.workers),
+             "--engine", args.engine, "--data-dir", args.data_dir],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            raise SystemExit(f"[{size}] 측정 실패")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        report["results"][str(size)] = result
+        print(f"[{size}] {result}", file=sys.stderr, flush=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text, encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failures = compare(report, baseline, args.max_slowdown, args.max_rss_growth)
+        for line in failures:
+            print(f"회귀: {line}", file=sys.stderr)
+        if failures:
+            return 1
+        print("기준 대비 회귀 없음", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
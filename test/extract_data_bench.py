@@ -0,0 +1,87 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processor import VISIT_NO, AUTH_NO, convert_dob, convert_dos, extract_cells, target_fields  # noqa: E402
+
+
+def extract_data_pandas(df: pd.DataFrame, pdf_path: str):
+    # 비교용: pandas 기반 이전 extract_data 구현
+    row_data = {}
+
+    labels = df.iloc[:, 0]
+    values = df.iloc[:, 1]
+    labels = labels.astype(str).str.strip().str.replace('\n', '', regex=False)
+    values = values.astype(str).str.strip().str.replace('\n', '', regex=False)
+
+    for field in target_fields:
+        mask = labels.str.contains(field["pattern"], case=False, na=False, regex=True)
+        if mask.any():
+            extracted_value = values[mask].iloc[0]
+            if field["name"] == "DOB":
+                row_data[field["name"]] = convert_dob(extracted_value)
+            elif field["name"] == "DOS":
+                row_data[field["name"]] = convert_dos(extracted_value)
+            elif field["name"] == "Visit No.":
+                visit_match = VISIT_NO.search(extracted_value)
+                auth_match = AUTH_NO.search(extracted_value)
+                row_data["Visit No"] = visit_match.group(1).strip() if visit_match else None
+                row_data["Authorization No"] = auth_match.group(1).strip() if auth_match else None
+            else:
+                row_data[field["name"]] = extracted_value
+        else:
+            row_data[field["name"]] = None
+
+    if row_data.get("Patient Name"):
+        row_data["File"] = pdf_path
+        return row_data
+    else:
+        return None
+
+
+def make_tables(n: int, seed: int = 0):
+    """PT 차트 표 모양의 (라벨 목록, 값 목록)을 n개 만든다. 일부는 누락/줄바꿈/None 셀 포함."""
+    rng = random.Random(seed)
+    base = [
+        ("Patient Name", "Doe, John"),
+        ("DOB", "June 5, 1980"),
+        ("Diagnosis/CC", "Low back\npain"),
+        ("Therapist", "Kim"),
+        ("DOS", "07/01/2025"),
+        ("Visit No.", "#3/12 (AT-0001234567)"),
+        ("Validity Date (s)", "07/01/2025 - 09/30/2025"),
+    ]
+    tables = []
+    for _ in range(n):
+        rows = [r for r in base if rng.random() > 0.05]
+        rng.shuffle(rows)
+        labels = [rng.choice([label, f" {label}\n", label.upper()]) for label, _ in rows]
+        values = [rng.choice([value, None]) if rng.random() < 0.05 else value for _, value in rows]
+        tables.append((labels, values))
+    return tables
+
+
+def main(n: int = 5000) -> None:
+    tables = make_tables(n)
+    frames = [pd.DataFrame({0: labels, 1: values}) for labels, values in tables]
+
+    t0 = time.perf_counter()
+    before = [extract_data_pandas(df, "bench.pdf") for df in frames]
+    t_before = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    after = [extract_cells(labels, values, "bench.pdf") for labels, values in tables]
+    t_after = time.perf_counter() - t0
+
+    assert before == after, "pandas 구현과 결과가 다릅니다."
+    print(f"tables: {n}")
+    print(f"pandas extract_data : {n / t_before:10.0f} records/s")
+    print(f"extract_cells       : {n / t_after:10.0f} records/s  (x{t_before / t_after:.1f})")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
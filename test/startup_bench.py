@@ -0,0 +1,169 @@
+"""
+앱 시작 시간 측정: launch.py의 두 진입 경로(같은 프로세스에서 stcli 실행 / streamlit 자식 프로세스)를
+preload 모드(background, off, eager)별로 띄우고 다음을 잰다.
+  - server_sec: 실행부터 /_stcore/health 응답까지
+  - first_render_sec: 실행부터 첫 세션의 스크립트 실행 완료까지 (클라이언트 기준)
+  - app 보고서(startup.report): script_start / first_render / preload_done 시점과 모듈별 import 시간
+
+브라우저 대신 웹소켓으로 세션을 열어 rerun_script를 보낸다. launch.py가 8501 포트를 쓰므로 비어 있어야 한다.
+
+예시:
+  python test/startup_bench.py
+  python test/startup_bench.py --entries inprocess --modes background off --repeat 3 --output startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+PORT = 8501
+ENTRIES = {
+    "inprocess": [sys.executable, str(ROOT / "launch.py")],
+    "subprocess": [sys.executable, "-c", "import launch; launch.main()"],
+}
+MODES = ("background", "off", "eager")
+TIMEOUT_SEC = 120
+
+
+def _port_busy(port: int) -> bool:
+    with socket.socket() as s:
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+def _wait_health(t0: float, deadline: float) -> float:
+    url = f"http://127.0.0.1:{PORT}/_stcore/health"
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as r:
+                if r.status == 200:
+                    return time.time() - t0
+        except OSError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError("서버가 응답하지 않습니다.")
+
+
+async def _first_run(t0: float) -> float:
+    """브라우저처럼 세션을 열고 첫 스크립트 실행이 끝날 때까지 기다린다."""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    ws = await websocket_connect(f"ws://127.0.0.1:{PORT}/_stcore/stream")
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    msg.rerun_script.page_script_hash = ""
+    await ws.write_message(msg.SerializeToString(), binary=True)
+    try:
+        while True:
+            data = await asyncio.wait_for(ws.read_message(), TIMEOUT_SEC)
+            if data is None:
+                raise RuntimeError("웹소켓 연결이 끊겼습니다.")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            if fwd.WhichOneof("type") == "script_finished":
+                return time.time() - t0
+    finally:
+        ws.close()
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    # subprocess 경로는 streamlit 자식 프로세스가 따로 있으므로 프로세스 그룹째 종료
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(proc.pid)], capture_output=True)
+    else:
+        os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        if os.name != "nt":
+            os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+
+def measure(entry: str, mode: str) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="tricare_startup_") as tmp:
+        report_path = Path(tmp) / "startup.json"
+        # 첫 실행 시 streamlit이 이메일 입력을 기다리지 않도록 빈 자격 증명을 둔 HOME을 쓴다.
+        credentials = Path(tmp) / ".streamlit" / "credentials.toml"
+        credentials.parent.mkdir()
+        credentials.write_text('[general]\nemail = ""\n', encoding="utf-8")
+        env = dict(
+            os.environ,
+            HOME=tmp,
+            USERPROFILE=tmp,
+            TRICARE_PRELOAD=mode,
+            TRICARE_STARTUP_REPORT=str(report_path),
+            BROWSER="none",
+        )
+        env.pop("TRICARE_LAUNCH_T0", None)
+        env.pop("TRICARE_LAUNCH_ENTRY", None)
+        t0 = time.time()
+        proc = subprocess.Popen(
+            ENTRIES[entry],
+            cwd=ROOT,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **({"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}),
+        )
+        try:
+            deadline = t0 + TIMEOUT_SEC
+            server_sec = _wait_health(t0, deadline)
+            first_render_sec = asyncio.run(_first_run(t0))
+            # 보고서는 스크립트 실행이 끝나기 전에 쓰인다. (startup 이전 버전과 비교할 때는 없음)
+            report_deadline = time.time() + 5
+            while not report_path.exists() and time.time() < report_deadline:
+                time.sleep(0.02)
+            app_report = json.loads(report_path.read_text(encoding="utf-8")) if report_path.exists() else None
+        finally:
+            _stop(proc)
+    return {"server_sec": round(server_sec, 3), "first_render_sec": round(first_render_sec, 3), "app": app_report}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="launch.py 진입 경로별 앱 시작 시간 측정")
+    parser.add_argument("--entries", nargs="+", choices=list(ENTRIES), default=list(ENTRIES), help="진입 경로")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="TRICARE_PRELOAD 모드")
+    parser.add_argument("--repeat", type=int, default=1, help="조합별 반복 횟수 (중앙값 보고)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if _port_busy(PORT):
+        print(f"포트 {PORT}이 사용 중입니다. 실행 중인 앱을 종료한 뒤 다시 실행하세요.", file=sys.stderr)
+        return 2
+
+    results: Dict[str, Any] = {}
+    print(f"{'entry':<11} {'preload':<11} {'server':>8} {'first':>8} {'script':>8} {'preload':>8}")
+    for entry in args.entries:
+        for mode in args.modes:
+            runs: List[Dict[str, Any]] = [measure(entry, mode) for _ in range(args.repeat)]
+            server = statistics.median(r["server_sec"] for r in runs)
+            first = statistics.median(r["first_render_sec"] for r in runs)
+            marks = (runs[-1]["app"] or {}).get("since_launch_sec", {})
+            results[f"{entry}/{mode}"] = {"server_sec": server, "first_render_sec": first, "runs": runs}
+            print(
+                f"{entry:<11} {mode:<11} {server:7.2f}s {first:7.2f}s "
+                f"{marks.get('script_start', float('nan')):7.2f}s {marks.get('preload_done', float('nan')):7.2f}s",
+                flush=True,
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
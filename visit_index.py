@@ -0,0 +1,362 @@
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+from discovery import ScanOptions
+from parse_cache import ParseCache, file_digest
+from processor import (
+    RecordStore,
+    _discover_pdfs,
+    _iter_parse_results,
+    _normalize_value,
+    build_pdf_frame,
+    export_table,
+    find_duplicate_pdfs,
+)
+
+DEFAULT_INDEX_PATH = Path.home() / ".tricare" / "visit_index.sqlite"
+
+# 레코드 키 <-> 컬럼
+_COLUMNS = {
+    "Patient Name": "patient",
+    "DOB": "dob",
+    "Diagnosis/CC": "diagnosis",
+    "Therapist": "therapist",
+    "DOS": "dos",
+    "Visit No": "visit_no",
+    "Authorization No": "auth_no",
+    "Validity Date (s)": "validity",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS visits (
+    file TEXT NOT NULL,
+    patient TEXT,
+    dob TEXT,
+    diagnosis TEXT,
+    therapist TEXT,
+    dos TEXT,
+    visit_no TEXT,
+    auth_no TEXT,
+    validity TEXT
+);
+CREATE INDEX IF NOT EXISTS visits_file ON visits (file);
+CREATE INDEX IF NOT EXISTS visits_patient ON visits (patient COLLATE NOCASE, dob, dos);
+CREATE INDEX IF NOT EXISTS visits_dob ON visits (dob);
+CREATE INDEX IF NOT EXISTS visits_dos ON visits (dos, patient, dob, diagnosis, visit_no, file);
+CREATE INDEX IF NOT EXISTS visits_auth ON visits (auth_no);
+"""
+
+
+class VisitIndex:
+    """
+    주차가 바뀌어도 계속 쌓이는 차트 방문 기록 색인. (SQLite)
+    parse_pdf 결과를 파일 단위로 저장하며, mtime/크기가 그대로인 파일은 다시 파싱하지 않는다.
+    파일마다 내용 해시를 저장해 내용이 같은 파일은 조회 시 가장 최근에 색인한 경로 하나만 쓴다.
+    환자/생년월일/진료일 범위/승인번호로 조회하고, 주간 시트는 PDF 없이 색인만으로 매칭할 수 있다.
+    이름/진단명은 매칭과 같은 규칙으로 공백을 정리해 저장하고, 날짜는 YYYY-MM-DD 문자열로 둔다.
+    """
+
+    def __init__(self, db_path: str | Path = DEFAULT_INDEX_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 파일마다 커밋하므로 WAL에서 안전한 수준으로 fsync를 줄인다.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if "digest" not in {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}:
+            self._add_digests()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_digest ON files (digest)")
+
+    def _add_digests(self) -> None:
+        # 해시 열이 없던 예전 색인: 열을 추가하고, 색인 후 바뀌지 않은 파일은 해시를 한 번 채운다.
+        with self._conn:
+            self._conn.execute("ALTER TABLE files ADD COLUMN digest TEXT")
+            for path, mtime_ns, size in self._conn.execute("SELECT path, mtime_ns, size FROM files").fetchall():
+                try:
+                    st = Path(path).stat()
+                    if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                        continue
+                    digest = file_digest(Path(path))
+                except OSError:
+                    continue
+                self._conn.execute("UPDATE files SET digest = ? WHERE path = ?", (digest, path))
+
+    def __enter__(self) -> "VisitIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # 저장
+    def add_file(self, file: str | Path, records: List[Dict[str, Any]], digest: str | None = None) -> None:
+        """
+        파일의 추출 결과로 기존 행을 바꾼다. (ZIP 멤버처럼 실제 파일이 없으면 mtime/크기는 0, 해시는 digest)
+        내용이 같은 다른 경로가 더 이상 없으면(이동/이름 변경) 그 경로의 행은 지운다.
+        """
+        path = Path(file)
+        try:
+            st = path.stat()
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+        except OSError:
+            mtime_ns, size = 0, 0
+        if digest is None and size:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, digest FROM files WHERE path = ?", (str(file),)
+            ).fetchone()
+            if row is not None and row[:2] == (mtime_ns, size) and row[2]:
+                digest = row[2]
+            else:
+                try:
+                    digest = file_digest(path)
+                except OSError:
+                    digest = None
+        moved = []
+        if digest is not None:
+            moved = [
+                other
+                for (other,) in self._conn.execute(
+                    "SELECT path FROM files WHERE digest = ? AND path != ?", (digest, str(file))
+                )
+                if not Path(other).exists()
+            ]
+        rows = [
+            (
+                str(file),
+                *(
+                    _normalize_value(rec.get(key)) if key in ("Patient Name", "Diagnosis/CC") else rec.get(key)
+                    for key in _COLUMNS
+                ),
+            )
+            for rec in records
+        ]
+        with self._conn:
+            self._conn.execute("DELETE FROM visits WHERE file = ?", (str(file),))
+            self._conn.executemany(
+                f"INSERT INTO visits (file, {', '.join(_COLUMNS.values())}) "
+                f"VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, indexed_at, digest) VALUES (?, ?, ?, ?, ?)",
+                (str(file), mtime_ns, size, time.time(), digest),
+            )
+            for other in moved:
+                self._conn.execute("DELETE FROM visits WHERE file = ?", (other,))
+                self._conn.execute("DELETE FROM files WHERE path = ?", (other,))
+
+    def remove_file(self, file: str | Path) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM visits WHERE file = ?", (str(file),))
+            self._conn.execute("DELETE FROM files WHERE path = ?", (str(file),))
+
+    def remove_missing(self, roots: Iterable[str | Path], present: Iterable[str]) -> int:
+        """roots 아래에 색인됐지만 present(이번 스캔에서 찾은 경로)에 없는 파일을 지우고 그 수를 돌려준다."""
+        present = set(present)
+        removed = 0
+        for root in roots:
+            prefix = str(Path(root))
+            for (path,) in self._conn.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall():
+                if path not in present and Path(path).is_relative_to(prefix):
+                    self.remove_file(path)
+                    removed += 1
+        return removed
+
+    def _is_current(self, path: Path) -> bool:
+        row = self._conn.execute("SELECT mtime_ns, size FROM files WHERE path = ?", (str(path),)).fetchone()
+        if row is None:
+            return False
+        st = path.stat()
+        return row[0] == st.st_mtime_ns and row[1] == st.st_size
+
+    def update(
+        self,
+        pdf_dir: str | list[str],
+        workers: int = 1,
+        stop_flag: Callable[[], bool] | None = None,
+        cache: ParseCache | None = None,
+        engine: str = "tables",
+        progress_cb: Callable[[int, int, Path, int], None] | None = None,
+        scan: ScanOptions | None = None,
+    ) -> Dict[str, int]:
+        """
+        PDF 루트를 스캔해 새로 생기거나 바뀐 파일만 파싱해 저장하고, 루트 아래에서 사라진 파일은 지운다.
+        내용이 같은 PDF는 발견 순서상 첫 파일만 색인하고, 나머지는 사라진 파일처럼 다룬다.
+        scan이 주어지면 그 설정으로 찾고, 제외 패턴/깊이 제한 밖의 파일도 사라진 파일처럼 다룬다.
+        반환: {"parsed", "unchanged", "removed", "duplicates"} 파일 수
+        """
+        pdf_list = _discover_pdfs(pdf_dir, scan)
+        keep, duplicates = find_duplicate_pdfs(pdf_list)
+        pdf_list = [pdf_list[i] for i in keep]
+        changed = [p for p in pdf_list if not self._is_current(p)]
+        stats = {
+            "parsed": 0,
+            "unchanged": len(pdf_list) - len(changed),
+            "removed": 0,
+            "duplicates": sum(len(paths) for paths in duplicates.values()),
+        }
+        for done, (_, file, rows) in enumerate(
+            _iter_parse_results(changed, workers=workers, stop_flag=stop_flag, cache=cache, engine=engine),
+            start=1,
+        ):
+            self.add_file(file, rows)
+            stats["parsed"] += 1
+            if progress_cb:
+                progress_cb(done, len(changed), file, len(rows))
+
+        roots = [pdf_dir] if isinstance(pdf_dir, str) else list(pdf_dir)
+        stats["removed"] = self.remove_missing(roots, (str(p) for p in pdf_list))
+        return stats
+
+    # 조회
+    def query(
+        self,
+        patient: str | None = None,
+        dob: str | None = None,
+        dos_from: str | None = None,
+        dos_to: str | None = None,
+        auth_no: str | None = None,
+        limit: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        조건에 맞는 방문 기록을 df_pdf와 같은 형식으로 돌려준다. (진료일, 파일 순)
+        patient는 대소문자 무시 일치이며 %를 넣으면 LIKE 검색. 날짜는 YYYY-MM-DD.
+        내용이 같은 파일이 여러 경로로 색인돼 있으면 가장 최근에 색인한 경로의 기록만 돌려준다.
+        """
+        # 같은 해시의 더 최근(같으면 경로순으로 앞선) 파일이 있는 경로는 뺀다.
+        where = [
+            "file NOT IN (SELECT f.path FROM files f JOIN files k ON k.digest = f.digest AND k.path != f.path "
+            "AND (k.indexed_at > f.indexed_at OR (k.indexed_at = f.indexed_at AND k.path < f.path)))"
+        ]
+        params = []
+        if patient:
+            patient = _normalize_value(patient)
+            if "%" in patient:
+                where.append("patient LIKE ?")
+            else:
+                where.append("patient = ? COLLATE NOCASE")
+            params.append(patient)
+        if dob:
+            where.append("dob = ?")
+            params.append(dob)
+        if dos_from:
+            where.append("dos >= ?")
+            params.append(dos_from)
+        if dos_to:
+            where.append("dos <= ?")
+            params.append(dos_to)
+        if auth_no:
+            where.append("auth_no = ?")
+            params.append(auth_no.strip())
+        sql = f"SELECT file, {', '.join(_COLUMNS.values())} FROM visits WHERE " + " AND ".join(where)
+        sql += " ORDER BY dos, file"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self._frame(self._conn.execute(sql, params))
+
+    def visits_for_sheet(self, df_excel: pd.DataFrame) -> pd.DataFrame:
+        """
+        load_excel_sheet로 읽은 주간 시트의 진료일 범위에 있는 방문 기록. (match_records 입력용)
+        매칭 키에 진료일이 포함되므로 범위 밖의 기록은 어떤 행과도 매칭되지 않는다.
+        내용이 같은 사본은 query와 같이 하나만 넣어 사본끼리 ambiguous가 되지 않는다.
+        """
+        dos = pd.to_datetime(df_excel["Date of Therapy"]).dropna()
+        if dos.empty:
+            return build_pdf_frame([])
+        return self.query(dos_from=dos.min().strftime("%Y-%m-%d"), dos_to=dos.max().strftime("%Y-%m-%d"))
+
+    def _frame(self, rows: Iterable[Tuple[Any, ...]]) -> pd.DataFrame:
+        keys = list(_COLUMNS)
+        store = RecordStore()
+        batch: List[Dict[str, Any]] = []
+        for row in rows:
+            rec = dict(zip(keys, row[1:]))
+            rec["File"] = row[0]
+            batch.append(rec)
+            if len(batch) >= 10000:
+                store.add(batch)
+                batch = []
+        store.add(batch)
+        if not len(store):
+            return pd.DataFrame(columns=[k for k in keys if k not in RecordStore.UNUSED_COLS] + ["File"])
+        return store.to_frame()
+
+    def stats(self) -> Dict[str, Any]:
+        files, visits = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM files), (SELECT COUNT(*) FROM visits)"
+        ).fetchone()
+        first, last = self._conn.execute("SELECT MIN(dos), MAX(dos) FROM visits WHERE dos != ''").fetchone()
+        return {"files": files, "visits": visits, "dos_from": first, "dos_to": last}
+
+
+def _cli() -> None:
+    parser = argparse.ArgumentParser(
+        description="방문 기록 색인 갱신/조회",
+        epilog="예시:\n  python visit_index.py update C:\\\\pdf_root --workers 4\n"
+               "  python visit_index.py query --patient \"Doe, John\" --from 2025-06-01 --to 2025-06-30\n"
+               "  python visit_index.py query --auth AT-0001234567 --output visits.csv",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="색인 SQLite 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_update = sub.add_parser("update", help="PDF 루트를 스캔해 색인 갱신")
+    p_update.add_argument("pdf_root", nargs="+", help="PDF 루트 절대경로 (여러 개 가능)")
+    p_update.add_argument("--workers", type=int, default=1, help="병렬 파싱 프로세스 수")
+    p_update.add_argument("--engine", choices=["tables", "words"], default="tables", help="추출 엔진")
+    p_update.add_argument("--cache", default=None, help="파싱 캐시 SQLite 경로")
+
+    p_query = sub.add_parser("query", help="방문 기록 조회")
+    p_query.add_argument("--patient", default=None, help="환자 이름 (%% 사용 시 부분 일치)")
+    p_query.add_argument("--dob", default=None, help="생년월일 YYYY-MM-DD")
+    p_query.add_argument("--from", dest="dos_from", default=None, help="진료일 시작 YYYY-MM-DD")
+    p_query.add_argument("--to", dest="dos_to", default=None, help="진료일 끝 YYYY-MM-DD")
+    p_query.add_argument("--auth", default=None, help="승인번호 (AT-...)")
+    p_query.add_argument("--limit", type=int, default=None, help="최대 건수")
+    p_query.add_argument("--output", default=None, help="결과 저장 경로 (xlsx/csv/parquet)")
+
+    sub.add_parser("stats", help="색인 요약")
+    args = parser.parse_args()
+
+    with VisitIndex(args.index) as index:
+        if args.command == "update":
+            cache = ParseCache(args.cache) if args.cache else None
+            try:
+                stats = index.update(args.pdf_root, workers=args.workers, cache=cache, engine=args.engine)
+            finally:
+                if cache is not None:
+                    cache.close()
+            print(
+                f"파싱: {stats['parsed']}, 변경 없음: {stats['unchanged']}, 삭제: {stats['removed']}, "
+                f"중복: {stats['duplicates']}"
+            )
+        elif args.command == "query":
+            df = index.query(args.patient, args.dob, args.dos_from, args.dos_to, args.auth, args.limit)
+            if args.output:
+                export_table(df, args.output, Path(args.output).suffix.lstrip(".").lower())
+                print(f"{len(df)}건 저장: {args.output}")
+            else:
+                with pd.option_context("display.max_rows", 200, "display.width", 200):
+                    print(df)
+        print(index.stats())
+
+
+if __name__ == "__main__":
+    _cli()
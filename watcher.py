@@ -0,0 +1,405 @@
+import argparse
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import pandas as pd
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from parse_cache import ParseCache, file_digest
+from processor import (
+    EXCEL_MATCH_KEYS,
+    EXPORT_FORMATS,
+    _ensure_abs_path,
+    _iter_parse_results,
+    build_pdf_frame,
+    export_table,
+    format_excel_output,
+    iter_pdf_records,
+    load_excel_sheet,
+    record_key,
+)
+
+# 마지막 변경 이벤트 후 이 시간 동안 조용하면 쓰기가 끝난 것으로 보고 처리
+SETTLE_SEC = 1.0
+POLL_SEC = 0.5
+# 읽기만 해도 생기는 opened/closed_no_write 이벤트는 무시 (자기 파싱으로 다시 깨어나지 않도록)
+_CHANGE_EVENTS = {"created", "modified", "moved", "deleted", "closed"}
+
+
+def _file_key(path: Path) -> str:
+    """같은 파일이 심볼릭 링크/대소문자가 다른 경로로 와도 하나로 보도록 정규화한 경로"""
+    return os.path.normcase(str(path.resolve()))
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, watcher: "ChartWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory or event.event_type not in _CHANGE_EVENTS:
+            return
+        for path in (event.src_path, event.dest_path):
+            if path:
+                self.watcher._touch(Path(path))
+
+
+class ChartWatcher:
+    """
+    PDF 루트를 감시하며 새로 생기거나 바뀐 PDF만 파싱해 레코드 표를 유지한다.
+    레코드가 바뀌면 그 레코드의 매칭 키에 해당하는 엑셀 행만 다시 매칭하고,
+    입력 엑셀이 바뀌면 엑셀만 다시 읽어 키 조회로 매칭한다. (PDF는 다시 파싱하지 않음)
+    """
+
+    def __init__(
+        self,
+        pdf_dir: str | list[str],
+        input_xlsx: str,
+        sheet_name: str,
+        columns: str,
+        engine: str = "tables",
+        workers: int = 1,
+        cache: ParseCache | None = None,
+        on_update: Callable[[str], None] | None = None,
+    ):
+        self.pdf_dir = pdf_dir
+        self.input_path = _ensure_abs_path(input_xlsx, "file")
+        self.sheet_name = sheet_name
+        self.columns = columns
+        self.engine = engine
+        self.workers = workers
+        self.cache = cache
+        self.on_update = on_update
+
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._pending: Dict[str, Tuple[Path, float]] = {}  # _file_key -> (경로, 마지막 변경 시각)
+        self._excel_touched: float | None = None
+        self._observer: Any = None
+        self._thread: threading.Thread | None = None
+
+        # 파싱한(남긴) 파일 -> (경로, 크기)와 필요할 때 계산한 내용 해시, 건너뛴 중복 사본 -> 남긴 파일
+        self._kept: Dict[str, Tuple[Path, int]] = {}
+        self._digests: Dict[str, str] = {}
+        self._copy_of: Dict[str, Tuple[str, Path]] = {}  # 사본 -> (남긴 파일, 사본 경로)
+        # 파일별(_file_key) 추출 레코드와 매칭 키 -> [(파일, 레코드)] 색인
+        self._files: Dict[str, List[Dict[str, Any]]] = {}
+        self._pdf_index: Dict[tuple, List[Tuple[str, Dict[str, Any]]]] = {}
+        # 엑셀 행 위치별 매칭 결과와 매칭 키 -> 행 위치 색인
+        self._excel = pd.DataFrame()
+        self._excel_rows: Dict[tuple, List[int]] = {}
+        self._visit: List[Any] = []
+        self._file_col: List[Any] = []
+        self._hit: List[bool] = []
+        self.matched = 0
+
+    def _notify(self, msg: str) -> None:
+        if self.on_update:
+            self.on_update(msg)
+
+    # 시작/종료
+    def start(
+        self,
+        progress_cb: Callable[[int, int, Path, int], None] | None = None,
+        stop_flag: Callable[[], bool] | None = None,
+    ) -> "ChartWatcher":
+        """감시를 켠 뒤 전체를 한 번 스캔한다. 스캔 중 생긴 변경은 스캔 후 반영된다."""
+        roots = [self.pdf_dir] if isinstance(self.pdf_dir, str) else list(self.pdf_dir)
+        self._roots = [_ensure_abs_path(r, "dir").resolve() for r in roots if r]
+        self._observer = Observer()
+        handler = _Handler(self)
+        for root in self._roots:
+            self._observer.schedule(handler, str(root), recursive=True)
+        if not any(self.input_path.resolve().is_relative_to(r) for r in self._roots):
+            self._observer.schedule(handler, str(self.input_path.parent), recursive=False)
+        self._observer.start()
+        try:
+            self._reload_excel()
+            # 이벤트와 같은 경로로 오도록 감시하는 (정규화된) 루트를 스캔한다.
+            duplicates: Dict[str, List[str]] = {}
+            for event in iter_pdf_records(
+                [str(r) for r in self._roots], workers=self.workers, stop_flag=stop_flag, cache=self.cache,
+                engine=self.engine, duplicate_files=duplicates,
+            ):
+                key = _file_key(event.file)
+                self._kept[key] = (event.file, event.file.stat().st_size)
+                self._set_file(key, event.records)
+                if progress_cb:
+                    progress_cb(event.done, event.total, event.file, len(event.records))
+            for kept, paths in duplicates.items():
+                for path in paths:
+                    self._copy_of[_file_key(Path(path))] = (_file_key(Path(kept)), Path(path))
+        except Exception:
+            self.stop()
+            raise
+        self._thread = threading.Thread(target=self._loop, name="tricare-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # 파일 이벤트
+    def _touch(self, path: Path) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if path.suffix.lower() == ".pdf":
+                self._pending[_file_key(path)] = (path, now)
+            elif path == self.input_path or path.resolve() == self.input_path.resolve():
+                self._excel_touched = now
+
+    def _loop(self) -> None:
+        while not self._stop.wait(POLL_SEC):
+            try:
+                self._process_pending()
+            except Exception as e:
+                self._notify(f"감시 처리 오류: {e}")
+
+    def _process_pending(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            settled = [(key, p) for key, (p, t) in self._pending.items() if now - t >= SETTLE_SEC]
+            for key, _ in settled:
+                del self._pending[key]
+            excel_changed = self._excel_touched is not None and now - self._excel_touched >= SETTLE_SEC
+            if excel_changed:
+                self._excel_touched = None
+
+        if excel_changed:
+            self._reload_excel()
+            self._notify(f"엑셀 변경 반영 - 매칭 성공: {self.matched}건")
+
+        existing = []
+        for key, p in sorted(settled):
+            self._forget(key)
+            if not p.is_file():
+                self._set_file(key, [])
+                self._notify(f"삭제 반영: {p.name}")
+                continue
+            kept = self._find_copy(key, p)
+            if kept is not None:
+                # 이미 파싱한 파일과 내용이 같으면(치료사별 사본 등) 레코드를 넣지 않는다. (ambiguous 방지)
+                self._copy_of[key] = (kept, p)
+                self._set_file(key, [])
+                self._notify(f"중복 PDF 건너뜀: {p.name} = {self._kept[kept][0]}")
+                continue
+            self._kept[key] = (p, p.stat().st_size)
+            existing.append(p)
+        for _, file, rows in _iter_parse_results(existing, cache=self.cache, engine=self.engine):
+            self._set_file(_file_key(file), rows)
+            self._notify(f"{file.name} | rows={len(rows)} | 매칭 성공: {self.matched}건")
+
+    # 중복 사본
+    def _forget(self, key: str) -> None:
+        """바뀌거나 지워진 파일의 크기/해시/중복 관계를 지운다. 이 파일 대신 건너뛴 사본은 다시 확인하도록 대기열에 넣는다."""
+        self._kept.pop(key, None)
+        self._digests.pop(key, None)
+        self._copy_of.pop(key, None)
+        copies = [(k, path) for k, (kept, path) in self._copy_of.items() if kept == key]
+        if copies:
+            ready = time.monotonic() - SETTLE_SEC
+            with self._lock:
+                for k, path in copies:
+                    del self._copy_of[k]
+                    self._pending.setdefault(k, (path, ready))
+
+    def _digest(self, key: str) -> str:
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = file_digest(self._kept[key][0])
+        return digest
+
+    def _find_copy(self, key: str, path: Path) -> str | None:
+        """이미 파싱한 파일 중 내용이 같은 파일. 크기가 같은 파일이 있을 때만 해시를 계산한다."""
+        size = path.stat().st_size
+        same_size = [k for k, (_, n) in self._kept.items() if n == size and k != key]
+        if not same_size:
+            return None
+        digest = file_digest(path)
+        for k in same_size:
+            try:
+                if self._digest(k) == digest:
+                    return k
+            except OSError:  # 지워졌지만 아직 이벤트를 처리하지 않은 파일
+                continue
+        return None
+
+    # 색인/매칭 갱신
+    def _set_file(self, file: str, records: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            affected = set()
+            for rec in self._files.pop(file, []):
+                key = record_key(rec)
+                if key is None:
+                    continue
+                refs = [ref for ref in self._pdf_index.get(key, []) if ref[0] != file]
+                if refs:
+                    self._pdf_index[key] = refs
+                else:
+                    self._pdf_index.pop(key, None)
+                affected.add(key)
+            if records:
+                self._files[file] = records
+            for rec in records:
+                key = record_key(rec)
+                if key is None:
+                    continue
+                self._pdf_index.setdefault(key, []).append((file, rec))
+                affected.add(key)
+            self._rematch(affected)
+
+    def _rematch(self, keys: Iterable[tuple]) -> None:
+        """주어진 키에 해당하는 엑셀 행만 다시 매칭. (PDF에 키가 정확히 1건일 때만 매칭)"""
+        for key in keys:
+            rows = self._excel_rows.get(key)
+            if not rows:
+                continue
+            refs = self._pdf_index.get(key, [])
+            rec = refs[0][1] if len(refs) == 1 else None
+            for r in rows:
+                self._visit[r] = rec["Visit No"] if rec else ""
+                self._file_col[r] = rec["File"] if rec else ""
+                self.matched += (rec is not None) - self._hit[r]
+                self._hit[r] = rec is not None
+
+    def _reload_excel(self) -> None:
+        df_excel = load_excel_sheet(self.input_path, self.sheet_name, self.columns)
+        with self._lock:
+            self._excel = df_excel
+            self._excel_rows = {}
+            for pos, key in enumerate(df_excel[EXCEL_MATCH_KEYS].itertuples(index=False, name=None)):
+                if not any(pd.isna(v) for v in key):
+                    self._excel_rows.setdefault(key, []).append(pos)
+            n = len(df_excel)
+            self._visit, self._file_col, self._hit = [""] * n, [""] * n, [False] * n
+            self.matched = 0
+            self._rematch(self._excel_rows)
+
+    def snapshot(self) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+        """run_matching과 같은 형식의 (df_pdf, df_excel, 매칭 건수)."""
+        with self._lock:
+            records = [rec for file in sorted(self._files) for rec in self._files[file]]
+            df_excel = self._excel.copy()
+            df_excel["Visit No"] = self._visit
+            df_excel["File"] = self._file_col
+            matched = self.matched
+        return build_pdf_frame(records), format_excel_output(df_excel), matched
+
+
+_watchers: Dict[tuple, ChartWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def watcher_key(pdf_dir: str | list[str], input_xlsx: str, sheet_name: str, columns: str, engine: str) -> tuple:
+    roots = (pdf_dir,) if isinstance(pdf_dir, str) else tuple(pdf_dir)
+    return roots, input_xlsx, sheet_name, columns, engine
+
+
+def ensure_watcher(
+    pdf_dir: str | list[str],
+    input_xlsx: str,
+    sheet_name: str,
+    columns: str,
+    engine: str = "tables",
+    workers: int = 1,
+    cache: ParseCache | None = None,
+    progress_cb: Callable[[int, int, Path, int], None] | None = None,
+    stop_flag: Callable[[], bool] | None = None,
+) -> Tuple[ChartWatcher, bool]:
+    """
+    같은 입력의 감시가 이미 실행 중이면 그대로, 없으면 새로 시작한다. (첫 시작은 전체 스캔)
+    반환: (watcher, 새로 시작했는지)
+    """
+    key = watcher_key(pdf_dir, input_xlsx, sheet_name, columns, engine)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is not None and watcher.alive:
+            if cache is not None:
+                cache.close()
+            return watcher, False
+    watcher = ChartWatcher(pdf_dir, input_xlsx, sheet_name, columns, engine=engine, workers=workers, cache=cache)
+    watcher.start(progress_cb=progress_cb, stop_flag=stop_flag)
+    with _watchers_lock:
+        _watchers[key] = watcher
+    return watcher, True
+
+
+def stop_watcher(key: tuple) -> None:
+    with _watchers_lock:
+        watcher = _watchers.pop(key, None)
+    if watcher is not None:
+        watcher.stop()
+
+
+def _cli() -> None:
+    parser = argparse.ArgumentParser(
+        description="PDF 폴더 감시 모드: 새 PDF만 파싱해 매칭 결과를 계속 갱신",
+        epilog="예시:\n  python watcher.py C:\\\\pdf_root --excel C:\\\\input.xlsx --sheet \"Jun 30 _ Jul 5\" "
+               "--output C:\\\\out\\\\merge.xlsx",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("pdf_root", nargs="+", help="감시할 PDF 루트 절대경로 (여러 개 가능)")
+    parser.add_argument("--excel", required=True, help="입력 엑셀 절대경로")
+    parser.add_argument("--sheet", required=True, help="시트명")
+    parser.add_argument("--columns", default="A:G", help="열 범위 (기본 A:G)")
+    parser.add_argument("--engine", choices=["tables", "words"], default="tables", help="추출 엔진")
+    parser.add_argument("--workers", type=int, default=1, help="초기 스캔 병렬 파싱 프로세스 수")
+    parser.add_argument("--cache", default=None, help="파싱 캐시 SQLite 경로")
+    parser.add_argument("--output", default=None, help="변경될 때마다 병합 결과를 저장할 경로 (xlsx/csv/parquet)")
+    args = parser.parse_args()
+
+    fmt = Path(args.output).suffix.lstrip(".").lower() if args.output else None
+    if fmt is not None and fmt not in EXPORT_FORMATS:
+        raise SystemExit(f"지원하지 않는 출력 형식입니다: {args.output}")
+
+    changed = threading.Event()
+
+    def on_update(msg: str) -> None:
+        print(msg, flush=True)
+        changed.set()
+
+    watcher = ChartWatcher(
+        args.pdf_root,
+        args.excel,
+        args.sheet,
+        args.columns,
+        engine=args.engine,
+        workers=args.workers,
+        cache=ParseCache(args.cache) if args.cache else None,
+        on_update=on_update,
+    )
+    watcher.start()
+    print(f"감시 시작 - 매칭 성공: {watcher.matched}건 (Ctrl+C로 종료)", flush=True)
+    changed.set()
+    try:
+        while True:
+            if changed.wait(1.0) and args.output:
+                changed.clear()
+                _, df_excel, _ = watcher.snapshot()
+                export_table(df_excel, args.output, fmt)
+            changed.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    _cli()